@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Build Pipeline Benchmark
+========================
+Generates a synthetic 'news/' tree and measures how build_site.py scales with it.
+
+Usage:
+    python benchmarks/bench_build.py
+    python benchmarks/bench_build.py --programmes 1000 --media 20 --article-kb 8
+    python benchmarks/bench_build.py --build-args "--jobs 4 --search" --compare benchmarks/results/old.json
+
+What it does:
+1. Copies build_site.py into a temporary directory
+2. Creates N programme folders, each with info.json, article.md and M small PNG media files
+3. Times a full build, a no-op incremental build and an incremental build after editing one article
+4. Records wall time, peak memory and the number of files written for each scenario
+5. Saves the results as JSON in benchmarks/results/ so runs can be compared between versions
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shlex
+import struct
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+# Configuration
+BENCH_DIR = Path(__file__).parent
+REPO_DIR = BENCH_DIR.parent
+BUILD_SCRIPT = REPO_DIR / "build_site.py"
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Runs build_site.py in a child process and reports its peak memory (including worker processes).
+# The resource module is Unix-only; on Windows psutil (if installed) gives the main process's peak, else 0.
+RUNNER = '''
+import sys, json, runpy
+try:
+    import resource
+except ImportError:
+    resource = None
+sys.argv = sys.argv[1:]
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+finally:
+    peak = 0
+    if resource:
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    else:
+        try:
+            import psutil
+            memory = psutil.Process().memory_info()
+            peak = getattr(memory, 'peak_wset', memory.rss) // 1024
+        except ImportError:
+            pass
+    sys.stderr.write("BENCH_PEAK_RSS_KB=" + json.dumps(peak) + "\\n")
+'''
+
+WORDS = (
+    "youth leadership camp community service volunteers training workshop programme matara "
+    "members football tournament christmas celebration students teachers awareness session "
+    "donation health clinic environment cleanup outreach sports music art vocational skills"
+).split()
+
+
+def make_png(width: int, height: int, rng: random.Random) -> bytes:
+    """Build a small valid greyscale PNG with random pixels (unique content per file)"""
+    rows = b"".join(b"\x00" + bytes(rng.randrange(256) for _ in range(width)) for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_article(size_bytes: int, rng: random.Random) -> str:
+    """Generate Markdown with headings, paragraphs and lists of roughly the given size"""
+    parts = []
+    length = 0
+    while length < size_bytes:
+        kind = rng.random()
+        if kind < 0.15:
+            block = "## " + " ".join(rng.choices(WORDS, k=4)).title()
+        elif kind < 0.35:
+            block = "\n".join("- " + " ".join(rng.choices(WORDS, k=6)) for _ in range(4))
+        else:
+            block = " ".join(rng.choices(WORDS, k=60)).capitalize() + ". **" + rng.choice(WORDS) + "** done."
+        parts.append(block)
+        length += len(block) + 2
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(site_dir: Path, programmes: int, media: int, article_kb: float, image_px: int, seed: int):
+    """Create a synthetic news/ tree with the given number of programmes and media files"""
+    rng = random.Random(seed)
+    news_dir = site_dir / "news"
+    news_dir.mkdir(parents=True)
+
+    for i in range(programmes):
+        folder = news_dir / f"programme-{i:05d}"
+        folder.mkdir()
+        date = f"{2015 + i % 11}-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        info = {
+            'title': " ".join(rng.choices(WORDS, k=5)).title(),
+            'date': date,
+            'description': " ".join(rng.choices(WORDS, k=20)).capitalize() + ".",
+        }
+        (folder / "info.json").write_text(json.dumps(info, indent=2), encoding='utf-8')
+        (folder / "article.md").write_text(make_article(int(article_kb * 1024), rng), encoding='utf-8')
+        (folder / "thumbnail.png").write_bytes(make_png(image_px, image_px, rng))
+        for m in range(media):
+            (folder / f"photo-{m:03d}.png").write_bytes(make_png(image_px, image_px, rng))
+
+
+def snapshot_tree(site_dir: Path) -> dict:
+    """Map every file under the site (except the build cache) to its (mtime, size)"""
+    snapshot = {}
+    for dir_path, dir_names, file_names in os.walk(site_dir):
+        dir_names[:] = [name for name in dir_names if name != ".build_cache"]
+        for name in file_names:
+            stat = os.stat(os.path.join(dir_path, name))
+            snapshot[os.path.join(dir_path, name)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def run_build(site_dir: Path, build_args: list) -> dict:
+    """Run one build in a child process; returns seconds, peak memory and files written"""
+    before = snapshot_tree(site_dir)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", RUNNER, str(site_dir / "build_site.py"), *build_args],
+        cwd=site_dir, capture_output=True, text=True
+    )
+    seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        print(result.stdout)
+        print(result.stderr)
+        raise RuntimeError(f"build_site.py failed with exit code {result.returncode}")
+
+    peak_rss_kb = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("BENCH_PEAK_RSS_KB="):
+            peak_rss_kb = json.loads(line.split("=", 1)[1])
+
+    after = snapshot_tree(site_dir)
+    files_written = sum(1 for path, stat in after.items() if before.get(path) != stat)
+    return {'seconds': round(seconds, 4), 'peak_rss_kb': peak_rss_kb, 'files_written': files_written}
+
+
+def run_scenarios(site_dir: Path, build_args: list, repeat: int) -> dict:
+    """Time full, no-op and one-article incremental builds (best of repeat runs each)"""
+    results = {}
+    edit_target = sorted((site_dir / "news").iterdir())[0] / "article.md"
+    source_files = {path for path in site_dir.rglob('*')}
+
+    def best(name: str, prepare, args: list):
+        runs = []
+        for _ in range(repeat):
+            prepare()
+            runs.append(run_build(site_dir, args))
+        results[name] = min(runs, key=lambda run: run['seconds'])
+        run = results[name]
+        print(f"    {name:<12} {run['seconds']:>9.3f}s  {run['peak_rss_kb'] / 1024:>8.1f} MB  "
+              f"{run['files_written']:>6} file(s) written")
+
+    def clear_outputs():
+        # Everything the previous build created (cache, pages, assets) goes, so each full run writes it all again
+        for path in sorted(site_dir.rglob('*'), reverse=True):
+            if path not in source_files:
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+
+    def edit_article():
+        with open(edit_target, 'a', encoding='utf-8') as f:
+            f.write(f"\nEdited at {time.time()}\n")
+
+    best('full', clear_outputs, build_args)
+    best('noop', lambda: None, ["--incremental", *build_args])
+    best('incremental', edit_article, ["--incremental", *build_args])
+    return results
+
+
+def print_comparison(results: dict, previous_file: Path):
+    """Print the change against a previous results file"""
+    with open(previous_file, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"[*] Compared with {previous_file}:")
+    for name, run in results.items():
+        old = previous.get('results', {}).get(name)
+        if not old or not old['seconds']:
+            continue
+        change = (run['seconds'] - old['seconds']) / old['seconds'] * 100
+        print(f"    {name:<12} {old['seconds']:>9.3f}s -> {run['seconds']:.3f}s ({change:+.1f}%)")
+
+
+def get_git_commit() -> str:
+    """Return the current commit of the repository, if available"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark build_site.py on a synthetic news/ tree.")
+    parser.add_argument('--programmes', type=int, default=200, help="number of programme folders (default 200)")
+    parser.add_argument('--media', type=int, default=5, help="media files per programme (default 5)")
+    parser.add_argument('--article-kb', type=float, default=4, help="approximate article.md size in KB (default 4)")
+    parser.add_argument('--image-px', type=int, default=64, help="width/height of generated images (default 64)")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per scenario; the fastest is kept (default 1)")
+    parser.add_argument('--seed', type=int, default=1, help="random seed for the synthetic content")
+    parser.add_argument('--build-args', default="", help="extra options passed to build_site.py, e.g. \"--jobs 4\"")
+    parser.add_argument('--output', type=Path, help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', type=Path, metavar='RESULTS', help="previous results file to compare against")
+    parser.add_argument('--keep', action='store_true', help="keep the generated site directory")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    build_args = shlex.split(args.build_args)
+
+    print("=" * 50)
+    print("  YMCA Matara Build Benchmark")
+    print("=" * 50)
+    print()
+
+    site_dir = Path(tempfile.mkdtemp(prefix="ymca-bench-"))
+    try:
+        print(f"[*] Generating {args.programmes} programme(s) with {args.media} media file(s) each...")
+        shutil.copy2(BUILD_SCRIPT, site_dir / "build_site.py")
+        generate_corpus(site_dir, args.programmes, args.media, args.article_kb, args.image_px, args.seed)
+        print(f"    {site_dir}")
+        print()
+
+        print(f"[*] Running scenarios (build_site.py {' '.join(build_args)})...")
+        results = run_scenarios(site_dir, build_args, args.repeat)
+        print()
+    finally:
+        if args.keep:
+            print(f"[*] Kept site directory: {site_dir}")
+        else:
+            shutil.rmtree(site_dir, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {
+            'programmes': args.programmes,
+            'media': args.media,
+            'article_kb': args.article_kb,
+            'image_px': args.image_px,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'build_args': build_args,
+        },
+        'results': results,
+    }
+
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Results saved: {output}")
+
+    if args.compare:
+        print()
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
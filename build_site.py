@@ -6,6 +6,26 @@ This script automatically generates the news section of the YMCA Matara website.
 
 Usage:
     python build_site.py
+    python build_site.py --incremental    # only rebuild programmes whose inputs changed
+    python build_site.py --jobs 4         # render programme pages in 4 worker processes
+    python build_site.py --external-css   # link a shared, content-hashed stylesheet instead of inlining it
+    python build_site.py --responsive-images  # resized JPEG/WebP derivatives with srcset (needs Pillow)
+    python build_site.py --placeholders   # inline blurred previews behind cards and gallery images (needs Pillow)
+    python build_site.py --page-size 24   # paginate news.html into news/page/N.html and news/archive/ shards
+    python build_site.py --json-index     # filter cards client-side from news/programmes.json
+    python build_site.py --search         # full-text search box backed by a sharded index in news/search/
+    python build_site.py --serve          # rebuild on changes, serve on :8000 and live-reload open pages
+    python build_site.py --timings        # print per-stage and slowest-programme timings
+    python build_site.py --profile build  # also write build.prof (cProfile) and build.json (timings)
+    python build_site.py --precompress    # write .gz/.br siblings of generated HTML/CSS/JSON
+    python build_site.py --minify         # strip comments/whitespace from pages, compact inline CSS/JS
+    python build_site.py --stream         # write news.html card by card with flat memory use
+    python build_site.py --dedupe-media   # serve identical photos from their first copy in news/
+    python build_site.py --video-posters  # poster frames for gallery videos, preload="none" (uses ffmpeg)
+    python build_site.py --gallery-batch 24  # first 24 gallery items in the page, the rest from gallery.json
+    python build_site.py --optimize-images  # lossless JPEG/PNG recompression, metadata stripped (in place)
+    python build_site.py --git-range A..B # re-render only programmes changed between two commits (CI)
+    python build_site.py --deploy-manifest  # list published files + added/changed/removed since last build
 
 What it does:
 1. Scans the 'news/' directory for programme folders
@@ -15,11 +35,31 @@ What it does:
 
 Requirements:
     pip install markdown
+    pip install pillow        (optional, for --responsive-images and --placeholders)
+    pip install brotli        (optional, adds .br files to --precompress)
+    ffmpeg                    (optional, extracts frames for --video-posters)
+    jpegtran                  (optional, optimises JPEG encoding for --optimize-images)
 """
 
 import os
 import re
 import json
+import io
+import gzip
+import html
+import base64
+import struct
+import time
+import shutil
+import threading
+import subprocess
+import hashlib
+import pstats
+import cProfile
+import argparse
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from datetime import datetime
 
@@ -35,15 +75,112 @@ except ImportError:
     print("=" * 50)
     exit(1)
 
+# Brotli is optional; --precompress writes only .gz files without it
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Pillow is optional and only needed for image processing stages
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:
+    Image = None
+
 # Configuration
 SCRIPT_DIR = Path(__file__).parent
 NEWS_DIR = SCRIPT_DIR / "news"
 NEWS_HTML = SCRIPT_DIR / "news.html"
+PAGE_DIR = NEWS_DIR / "page"
+ARCHIVE_DIR = NEWS_DIR / "archive"
+PROGRAMME_INDEX_JSON = NEWS_DIR / "programmes.json"
+SEARCH_DIR = NEWS_DIR / "search"
+
+# Cards rendered into news.html (and per "Show more" click) when filtering from the JSON index
+INDEX_BATCH_SIZE = 12
+
+# Generated folders inside news/ that are not programmes, and generated files inside programme folders
+GENERATED_DIRS = {'page', 'archive', 'search'}
+GENERATED_FILES = {'index.html', 'gallery.json'}
+
+# Seconds between checks of news/ for changes in --watch/--serve mode
+WATCH_INTERVAL = 0.3
+BUILD_CACHE_DIR = SCRIPT_DIR / ".build_cache"
+MANIFEST_FILE = BUILD_CACHE_DIR / "manifest.json"
+MARKDOWN_CACHE_DIR = BUILD_CACHE_DIR / "markdown"
+ASSETS_DIR = SCRIPT_DIR / "assets"
+DERIVED_DIR = ASSETS_DIR / "derived"
+POSTER_DIR = ASSETS_DIR / "posters"
+
+# Published file list with content hashes, plus what changed since the previous build (--deploy-manifest).
+# It lives in the site root so the copy committed by the last deploy is the baseline for the next one.
+DEPLOY_MANIFEST = SCRIPT_DIR / "deploy-manifest.json"
+
+# What the site publishes: these folders, plus pages and their compressed siblings in the site root
+PUBLISHED_DIRS = ('news', 'images', 'assets')
+PUBLISHED_ROOT_SUFFIXES = {'.html', '.css', '.js', '.gz', '.br'}
+
+# Markdown extensions used for article.md, and the size limit of the rendered-article cache
+MARKDOWN_EXTENSIONS = ['extra']
+MARKDOWN_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Generated files that get pre-compressed siblings, and the sibling suffixes
+PRECOMPRESS_EXTENSIONS = {'.html', '.css', '.json'}
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+# HTML minification: elements whose content is kept verbatim (script/style are compacted separately),
+# and block-level tags around which whitespace never renders
+MINIFY_PROTECTED = re.compile(r'(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)', re.DOTALL | re.IGNORECASE)
+MINIFY_TOKENS = re.compile(r'<!--.*?-->|<(?:[^>"\']|"[^"]*"|\'[^\']*\')*>', re.DOTALL)
+MINIFY_BLOCK_TAGS = {
+    'html', 'head', 'body', 'meta', 'link', 'title', 'script', 'style', 'nav', 'header', 'main', 'footer',
+    'section', 'article', 'aside', 'div', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'dl',
+    'dt', 'dd', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'blockquote', 'hr', 'br', 'pre',
+    'figure', 'figcaption', 'select', 'option', 'picture', 'source', '!doctype',
+}
 
 # Supported media extensions
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'}
 VIDEO_EXTENSIONS = {'.mp4', '.webm', '.mov', '.avi', '.mkv'}
 
+# Maximum width of video poster frames, and the generic poster used when no frame can be extracted
+POSTER_WIDTH = 640
+POSTER_FALLBACK = POSTER_DIR / "video.svg"
+POSTER_FALLBACK_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="640" height="360" viewBox="0 0 640 360">'
+    '<rect width="640" height="360" fill="#1f2937"/>'
+    '<circle cx="320" cy="180" r="48" fill="#ffffff" fill-opacity="0.85"/>'
+    '<path d="M305 155v50l42-25z" fill="#004a99"/></svg>'
+)
+
+# Photos that --optimize-images recompresses losslessly, and the JPEG APPn segments it keeps:
+# JFIF (APP0), ICC colour profile (APP2) and Adobe colour transform (APP14)
+OPTIMIZE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+JPEG_KEPT_APP_MARKERS = {0xE0, 0xE2, 0xEE}
+
+# Width in pixels of the blurred low-quality placeholder previews
+PLACEHOLDER_WIDTH = 16
+
+# Formats whose intrinsic size can be read from the file header
+PROBE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+# Raster formats that get resized derivatives, and the widths generated for them
+RESPONSIVE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+RESPONSIVE_WIDTHS = (320, 640, 1024, 1600)
+GALLERY_SIZES = "(max-width: 768px) 100vw, 300px"
+CARD_SIZES = "(max-width: 768px) 100vw, 400px"
+
+# Full-text search: token separators (mirrored in the news.html search script), ignored words,
+# per-field term weights and BM25 parameters
+SEARCH_SPLIT = re.compile(r"[\s\u0000-\u002f\u003a-\u0040\u005b-\u0060\u007b-\u00bf\u2000-\u206f\u3000-\u303f]+")
+SEARCH_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'of', 'on',
+    'or', 'that', 'the', 'this', 'to', 'was', 'were', 'with',
+}
+SEARCH_FIELD_WEIGHTS = {'title': 3, 'description': 2, 'body': 1}
+SEARCH_BM25_K1 = 1.2
+SEARCH_BM25_B = 0.75
+
 # Month names for display
 MONTH_NAMES = [
     'January', 'February', 'March', 'April', 'May', 'June',
@@ -51,9 +188,141 @@ MONTH_NAMES = [
 ]
 
 
-def get_common_styles() -> str:
-    """Return the common CSS styles used across all pages"""
-    return '''
+# Styles of optional listing features, only included when the feature is enabled
+SEARCH_STYLES = '''
+        /* Search */
+        .search-row {
+            margin-bottom: 1rem;
+        }
+
+        .search-input {
+            width: 100%;
+            padding: 0.75rem 1rem;
+            border: 2px solid var(--gray-200);
+            border-radius: 10px;
+            font-family: inherit;
+            font-size: 1rem;
+            color: var(--gray-700);
+            transition: border-color 0.2s;
+        }
+
+        .search-input:focus {
+            outline: none;
+            border-color: var(--ymca-blue);
+        }
+
+        .search-results {
+            display: none;
+            flex-direction: column;
+            gap: 1rem;
+        }
+
+        .searching .search-results {
+            display: flex;
+        }
+
+        .searching .news-grid,
+        .searching .pagination,
+        .searching .load-more,
+        .searching .no-results {
+            display: none;
+        }
+
+        .search-result {
+            display: block;
+            padding: 1.25rem 1.5rem;
+            background: var(--white);
+            border-radius: 16px;
+            box-shadow: var(--shadow-md);
+            text-decoration: none;
+            color: inherit;
+        }
+
+        .search-result:hover {
+            box-shadow: var(--shadow-lg);
+        }
+
+        .search-result h3 {
+            color: var(--ymca-blue);
+            font-size: 1.1rem;
+            margin-bottom: 0.25rem;
+        }
+
+        .search-result-date {
+            font-size: 0.85rem;
+            color: var(--gray-600);
+        }
+'''
+
+PAGINATION_STYLES = '''
+        /* Pagination */
+        .pagination {
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            flex-wrap: wrap;
+            gap: 0.5rem;
+            margin-top: 2.5rem;
+        }
+
+        .pagination a,
+        .pagination span {
+            min-width: 2.5rem;
+            padding: 0.5rem 0.9rem;
+            border-radius: 10px;
+            text-align: center;
+            text-decoration: none;
+            font-weight: 600;
+            color: var(--ymca-blue);
+            background: var(--white);
+            box-shadow: var(--shadow-sm);
+        }
+
+        .pagination a:hover {
+            background: var(--gray-100);
+        }
+
+        .pagination .current {
+            color: var(--white);
+            background: var(--ymca-blue);
+        }
+'''
+
+LOAD_MORE_STYLES = '''
+        /* Show More (JSON index listing) */
+        .load-more {
+            display: flex;
+            justify-content: center;
+            margin-top: 2.5rem;
+        }
+
+        .load-more.hidden {
+            display: none;
+        }
+
+        .load-more-btn {
+            padding: 0.75rem 2rem;
+            border: 2px solid var(--ymca-blue);
+            border-radius: 10px;
+            font-family: inherit;
+            font-size: 1rem;
+            font-weight: 600;
+            color: var(--ymca-blue);
+            background: var(--white);
+            cursor: pointer;
+            transition: all 0.2s;
+        }
+
+        .load-more-btn:hover {
+            color: var(--white);
+            background: var(--ymca-blue);
+        }
+'''
+
+
+def get_common_styles(search: bool = False, pagination: bool = False, load_more: bool = False) -> str:
+    """Return the common CSS styles used across all pages, plus those of the enabled listing features"""
+    styles = '''
         :root {
             --ymca-blue: #004a99;
             --ymca-blue-dark: #003570;
@@ -603,6 +872,11 @@ def get_common_styles() -> str:
             display: block;
         }
 
+        .gallery-item picture,
+        .news-card picture {
+            display: contents;
+        }
+
         .gallery-item video {
             width: 100%;
             height: 100%;
@@ -783,6 +1057,141 @@ def get_common_styles() -> str:
             }
         }
     '''
+    if search:
+        styles += SEARCH_STYLES
+    if pagination:
+        styles += PAGINATION_STYLES
+    if load_more:
+        styles += LOAD_MORE_STYLES
+    return styles
+
+
+def minify_css(css: str) -> str:
+    """Strip comments and the whitespace around CSS punctuation, leaving quoted strings untouched"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(
+        r'("[^"]*"|\'[^\']*\')|\s*([{};,>])\s*|(:)\s+|\s+',
+        lambda m: m.group(1) or m.group(2) or m.group(3) or " ",
+        css
+    )
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js: str) -> str:
+    """Drop indentation, blank lines and whole-line // comments (line breaks are kept, so ASI is unaffected)"""
+    lines = (line.strip() for line in js.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith('//'))
+
+
+def _minify_tag(tag: str) -> str:
+    """Collapse whitespace between the attributes of one tag, leaving attribute values untouched"""
+    tag = re.sub(r'("[^"]*"|\'[^\']*\')|\s+', lambda m: m.group(1) or " ", tag)
+    return re.sub(r'\s+(/?>)$', r'\1', tag)
+
+
+def _is_block_tag(token: str) -> bool:
+    """Whether a tag token opens or closes a block-level element"""
+    name = re.match(r'</?([!\w-]+)', token)
+    return bool(name) and name.group(1).lower() in MINIFY_BLOCK_TAGS
+
+
+def _minify_markup(markup: str) -> str:
+    """Minify HTML that contains no protected elements: drop comments and collapse whitespace between tags"""
+    tokens = []
+    position = 0
+    for match in MINIFY_TOKENS.finditer(markup):
+        tokens.append(markup[position:match.start()])
+        tokens.append(match.group())
+        position = match.end()
+    tokens.append(markup[position:])
+
+    # Even indices are text between tags, odd indices are tags and comments
+    for i in range(1, len(tokens), 2):
+        tokens[i] = "" if tokens[i].startswith('<!--') else _minify_tag(tokens[i])
+    for i in range(0, len(tokens), 2):
+        text = re.sub(r'\s+', " ", tokens[i])
+        if i == 0 or _is_block_tag(tokens[i - 1]):
+            text = text.lstrip()
+        if i == len(tokens) - 1 or _is_block_tag(tokens[i + 1]):
+            text = text.rstrip()
+        tokens[i] = text
+    return "".join(tokens)
+
+
+def minify_html(page: str) -> str:
+    """Minify a generated page: strip comments and redundant whitespace, compact inline CSS and JS
+
+    The contents of <pre> and <textarea> are kept verbatim.
+    """
+    parts = []
+    position = 0
+    for match in MINIFY_PROTECTED.finditer(page):
+        parts.append(_minify_markup(page[position:match.start()] + match.group(1)))
+        tag = match.group(2).lower()
+        if tag == 'style':
+            parts.append(minify_css(match.group(3)))
+        elif tag == 'script':
+            parts.append(minify_js(match.group(3)))
+        else:
+            parts.append(match.group(3))
+        position = match.start(4)
+    parts.append(_minify_markup(page[position:]))
+    return "".join(parts)
+
+
+def get_stylesheet_html(css_href: str = None, **features) -> str:
+    """Return a <link> to the shared stylesheet, or inline the styles (with the given features) if there is none"""
+    if css_href:
+        return f'<link rel="stylesheet" href="{css_href}">'
+    return f'<style>{get_common_styles(**features)}</style>'
+
+
+def write_stylesheet(minify: bool = False, **features) -> str:
+    """Write the common styles to assets/site.<hash>.css and return its path relative to the site root
+    
+    features are the listing features used anywhere on the site (see get_common_styles()).
+    """
+    css = get_common_styles(**features)
+    if minify:
+        css = minify_css(css)
+    css_name = f"site.{hash_bytes(css.encode('utf-8'))[:10]}.css"
+    css_file = ASSETS_DIR / css_name
+    
+    ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+    write_if_changed(css_file, css)
+    
+    # Remove stylesheets left behind by previous versions of the CSS
+    for old_file in ASSETS_DIR.glob('site.*.css'):
+        if old_file.name != css_name:
+            remove_output(old_file)
+    
+    return f"assets/{css_name}"
+
+
+def get_image_html(src: str, attrs: str, image_meta: dict = None, root: str = "", sizes: str = GALLERY_SIZES) -> str:
+    """Return an <img> tag, wrapped in a <picture> with WebP/original srcsets when derivatives exist"""
+    image_meta = image_meta or {}
+    if image_meta.get('width'):
+        attrs += f' width="{image_meta["width"]}" height="{image_meta["height"]}"'
+    
+    variants = image_meta.get('variants')
+    if not variants:
+        return f'<img src="{src}" {attrs}>'
+    
+    srcset = ", ".join(f"{root}{v['src']} {v['width']}w" for v in variants)
+    webp_srcset = ", ".join(f"{root}{v['webp']} {v['width']}w" for v in variants)
+    return (
+        f'<picture><source type="image/webp" srcset="{webp_srcset}" sizes="{sizes}">'
+        f'<img src="{src}" srcset="{srcset}" sizes="{sizes}" {attrs}></picture>'
+    )
+
+
+def get_placeholder_style(image_meta: dict = None) -> str:
+    """Return a style attribute showing the image's blurred preview until the real image loads"""
+    placeholder = (image_meta or {}).get('placeholder')
+    if not placeholder:
+        return ""
+    return f' style="background: {placeholder["color"]} url({placeholder["uri"]}) center / cover no-repeat"'
 
 
 def format_date_display(date_str: str) -> str:
@@ -794,147 +1203,185 @@ def format_date_display(date_str: str) -> str:
         return date_str
 
 
-def generate_news_html(programmes: list, years: list) -> str:
-    """Generate the main news.html page listing all programmes with filters"""
-    
-    # Generate year options
-    year_options = '<option value="all">All Years</option>\n'
-    for year in years:
-        year_options += f'                        <option value="{year}">{year}</option>\n'
-    
-    # Generate month options
-    month_options = '<option value="all">All Months</option>\n'
-    for i, month in enumerate(MONTH_NAMES, 1):
-        month_options += f'                        <option value="{i}">{month}</option>\n'
-    
-    # Generate programme cards
-    if programmes:
-        cards_html = ""
-        for prog in programmes:
-            # Check for thumbnail
-            thumbnail_file = prog.get('thumbnail_file')
-            thumb_html = ""
-            card_class = "news-card"
-            
-            if thumbnail_file:
-                thumb_html = f'''
-                <img src="news/{prog['folder']}/{thumbnail_file}" class="card-bg-thumb" alt="" loading="lazy">
-                <div class="card-overlay"></div>
-                '''
-                card_class += " has-thumbnail"
+# Shared page the filters open for year/month combinations without programmes
+EMPTY_LISTING_PATH = "news/archive/empty.html"
 
-            cards_html += f'''
-            <a href="news/{prog['folder']}/index.html" class="{card_class}" data-year="{prog['year']}" data-month="{prog['month']}">
-                {thumb_html}
-                <div class="news-card-header">
-                    <h3>{prog['title']}</h3>
-                    <div class="news-card-date">
-                        <span>{prog['date_display']}</span>
-                    </div>
-                </div>
-                <div class="news-card-body">
-                    <p>{prog['description']}</p>
-                </div>
-                <div class="news-card-footer">
-                    {f'<span class="footer-btn">View Programme →</span>' if thumbnail_file else 'View Programme →'}
-                </div>
-            </a>
-            '''
-        
-        content_html = f'''
-        <!-- Filter Section -->
-        <div class="filter-section">
-            <div class="filter-row">
-                <span class="filter-label">Filter by:</span>
-                <select id="yearFilter" class="filter-select" onchange="filterProgrammes()">
-                    {year_options}
-                </select>
-                <select id="monthFilter" class="filter-select" onchange="filterProgrammes()">
-                    {month_options}
-                </select>
-            </div>
-        </div>
 
-        <!-- Programme Cards -->
-        <div class="news-grid" id="newsGrid">
-            {cards_html}
-        </div>
+def listing_path(year: str = 'all', month: str = 'all', page: int = 1) -> str:
+    """Return the site-relative path of a pre-rendered listing shard (mirrored by filterProgrammes() in JS)"""
+    if year == 'all' and month == 'all':
+        return "news.html" if page == 1 else f"news/page/{page}.html"
+    base = f"news/archive/{year}/" + (f"{month}/" if month != 'all' else "")
+    return base + ("index.html" if page == 1 else f"page/{page}.html")
 
-        <!-- No Results Message -->
-        <div class="no-results" id="noResults">
-            <div class="no-results-icon">🔍</div>
-            <h3>No programmes found</h3>
-            <p>No programmes match the selected period. Try adjusting your filters.</p>
-        </div>
-        '''
-    else:
-        content_html = '''
-        <div class="empty-state">
-            <div class="empty-state-icon">📰</div>
-            <h3>No Programmes Yet</h3>
-            <p>Check back soon for updates on our latest programmes and activities!</p>
-        </div>
-        '''
+
+def generate_pagination_html(listing: dict, root: str) -> str:
+    """Generate previous/next and numbered links between the pages of one listing"""
+    page, pages = listing['page'], listing['pages']
+    if pages <= 1:
+        return ""
     
-    # JavaScript filter function
-    filter_script = '''
-        function toggleMenu() {
-            document.getElementById('navLinks').classList.toggle('active');
-        }
+    links = []
+    if page > 1:
+        links.append(f'<a href="{root}{listing_path(listing["year"], listing["month"], page - 1)}" rel="prev">← Newer</a>')
+    for number in range(1, pages + 1):
+        if number == page:
+            links.append(f'<span class="current">{number}</span>')
+        else:
+            links.append(f'<a href="{root}{listing_path(listing["year"], listing["month"], number)}">{number}</a>')
+    if page < pages:
+        links.append(f'<a href="{root}{listing_path(listing["year"], listing["month"], page + 1)}" rel="next">Older →</a>')
+    
+    return '<nav class="pagination" aria-label="Pages">' + "".join(links) + '</nav>'
+
+
+def generate_search_script(root: str = "") -> str:
+    """Return the news.html search script that loads index shards written by write_search_index()"""
+    return f'''
+        // Full-text search over the sharded index (see write_search_index() in build_site.py)
+        const SEARCH_URL = '{root}news/search/';
+        const SEARCH_SPLIT = /{SEARCH_SPLIT.pattern}/u;
+        const SEARCH_STOPWORDS = new Set({json.dumps(sorted(SEARCH_STOPWORDS))});
+        const searchShards = {{}};
+        let searchMeta = null;
+        let searchTimer = null;
+
+        function loadSearchJson(name) {{
+            if (!searchShards[name]) {{
+                searchShards[name] = fetch(SEARCH_URL + name + '.json')
+                    .then(response => response.ok ? response.json() : {{}})
+                    .catch(() => ({{}}));
+            }}
+            return searchShards[name];
+        }}
 
-        function filterProgrammes() {
-            const yearFilter = document.getElementById('yearFilter').value;
-            const monthFilter = document.getElementById('monthFilter').value;
-            const cards = document.querySelectorAll('.news-card');
-            const noResults = document.getElementById('noResults');
-            
-            let visibleCount = 0;
+        function shardName(term) {{
+            const prefix = Array.from(term).slice(0, 2).join('');
+            return Array.from(new TextEncoder().encode(prefix)).map(b => b.toString(16).padStart(2, '0')).join('');
+        }}
 
-            cards.forEach(card => {
-                const cardYear = card.dataset.year;
-                const cardMonth = card.dataset.month;
-                
-                const matchYear = yearFilter === 'all' || cardYear === yearFilter;
-                const matchMonth = monthFilter === 'all' || cardMonth === monthFilter;
+        // Same terms as search_tokens() in build_site.py, so stopwords never turn into prefix searches
+        function searchTokens(text) {{
+            return text.toLowerCase().split(SEARCH_SPLIT)
+                .filter(t => Array.from(t).length >= 2 && !SEARCH_STOPWORDS.has(t));
+        }}
 
-                if (matchYear && matchMonth) {
-                    card.classList.remove('hidden');
-                    visibleCount++;
-                } else {
-                    card.classList.add('hidden');
-                }
-            });
+        async function runSearch(query) {{
+            const tokens = searchTokens(query);
+            if (!searchMeta) searchMeta = await loadSearchJson('docs');
+            const shards = await Promise.all(tokens.map(t => loadSearchJson(shardName(t))));
+            const {{ docs, avgdl, k1, b }} = searchMeta;
+            const scores = new Map();
+
+            tokens.forEach((token, i) => {{
+                const matched = new Map();
+                for (const [term, postings] of Object.entries(shards[i])) {{
+                    if (!term.startsWith(token)) continue;
+                    // Whole-word matches rank above prefix matches
+                    const boost = term === token ? 1 : 0.7;
+                    const df = postings.length / 2;
+                    const idf = Math.log(1 + (docs.length - df + 0.5) / (df + 0.5));
+                    for (let p = 0; p < postings.length; p += 2) {{
+                        const doc = postings[p], tf = postings[p + 1];
+                        const norm = tf * (k1 + 1) / (tf + k1 * (1 - b + b * docs[doc][3] / avgdl));
+                        matched.set(doc, Math.max(matched.get(doc) || 0, boost * idf * norm));
+                    }}
+                }}
+                matched.forEach((score, doc) => {{
+                    const entry = scores.get(doc) || {{ hits: 0, score: 0 }};
+                    entry.hits += 1;
+                    entry.score += score;
+                    scores.set(doc, entry);
+                }});
+            }});
+
+            return Array.from(scores.entries())
+                .sort((x, y) => (y[1].hits - x[1].hits) || (y[1].score - x[1].score))
+                .slice(0, 20)
+                .map(([doc]) => docs[doc]);
+        }}
 
-            // Show/hide no results message
-            if (noResults) {
-                if (visibleCount === 0) {
-                    noResults.classList.add('visible');
-                } else {
-                    noResults.classList.remove('visible');
-                }
-            }
-        }
+        function onSearchInput(event) {{
+            clearTimeout(searchTimer);
+            const query = event.target.value.trim();
+            searchTimer = setTimeout(() => showSearchResults(query), 150);
+        }}
+
+        async function showSearchResults(query) {{
+            const main = document.querySelector('.main-content');
+            const results = document.getElementById('searchResults');
+            if (searchTokens(query).length === 0) {{
+                main.classList.remove('searching');
+                return;
+            }}
+            const found = await runSearch(query);
+            const div = document.createElement('div');
+            const escape = text => {{ div.textContent = text; return div.innerHTML; }};
+            results.innerHTML = found.length
+                ? found.map(doc => '<a class="search-result" href="{root}news/' + doc[0] + '/index.html">'
+                    + '<h3>' + escape(doc[1]) + '</h3><span class="search-result-date">' + escape(doc[2]) + '</span></a>').join('')
+                : '<p>No programmes match your search.</p>';
+            main.classList.add('searching');
+        }}
     '''
+
+
+class Template:
+    """Markup with {{slot}} placeholders, split once into the literal text between them and the slot names
     
-    return f'''<!DOCTYPE html>
+    render(**values) returns small fragments (such as one card) as a string. parts(**values) returns a flat
+    list of strings instead and accepts lists of parts as slot values, so a whole page is assembled with a
+    single join (or written out piece by piece) rather than copying every nested fragment into its parent.
+    """
+
+    SLOT = re.compile(r'\{\{(\w+)\}\}')
+
+    def __init__(self, source: str):
+        pieces = self.SLOT.split(source)
+        self.literals = tuple(pieces[0::2])
+        self.slots = tuple(pieces[1::2])
+
+    def render(self, **values) -> str:
+        """Return the markup with every slot filled in (one join, faster than str.format_map())"""
+        parts = [None] * (2 * len(self.slots) + 1)
+        parts[0::2] = self.literals
+        parts[1::2] = [values[slot] for slot in self.slots]
+        return ''.join(parts)
+
+    def parts(self, **values) -> list:
+        """Return the literals and slot values in order, splicing in slot values that are lists of parts"""
+        parts = []
+        for literal, slot in zip(self.literals, self.slots):
+            parts.append(literal)
+            value = values[slot]
+            if isinstance(value, list):
+                parts.extend(value)
+            else:
+                parts.append(value)
+        parts.append(self.literals[-1])
+        return parts
+
+
+# Shared page layout: head, navbar, page header, main content, footer and script
+BASE_TEMPLATE = Template('''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="description" content="Latest news and programmes from YMCA Matara, Sri Lanka.">
-    <title>News & Programmes | YMCA Matara</title>
+    <meta name="description" content="{{description}}">
+    <title>{{title}} | YMCA Matara</title>
     <link rel="preconnect" href="https://fonts.googleapis.com">
     <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
     <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap" rel="stylesheet">
-    <link rel="icon" type="image/png" href="images/ymca.png">
-    <style>{get_common_styles()}</style>
+    <link rel="icon" type="image/png" href="{{root}}images/ymca.png">
+    {{stylesheet}}
 </head>
 <body>
     <!-- Navigation -->
     <nav class="navbar">
         <div class="nav-container">
-            <a href="index.html" class="logo">
-                <img src="images/ymca.png" class="logo-icon" alt="YMCA Logo">
+            <a href="{{root}}index.html" class="logo">
+                <img src="{{root}}images/ymca.png" class="logo-icon" alt="YMCA Logo">
                 <div class="logo-text">
                     YMCA Matara
                     <span>Sri Lanka</span>
@@ -942,8 +1389,8 @@ def generate_news_html(programmes: list, years: list) -> str:
             </a>
             <button class="mobile-menu-btn" onclick="toggleMenu()" aria-label="Toggle menu">☰</button>
             <ul class="nav-links" id="navLinks">
-                <li><a href="index.html">About</a></li>
-                <li><a href="news.html" class="active">News</a></li>
+                <li><a href="{{root}}index.html">About</a></li>
+                <li><a href="{{root}}news.html" class="active">News</a></li>
             </ul>
         </div>
     </nav>
@@ -951,17 +1398,16 @@ def generate_news_html(programmes: list, years: list) -> str:
     <!-- Page Header -->
     <header class="page-header">
         <div class="page-header-content">
-            <h1>News & Programmes</h1>
-            <p>Stay updated with our latest activities and completed programmes</p>
+            {{header}}
         </div>
     </header>
 
     <!-- Main Content -->
     <main class="main-content">
-        {content_html}
+        {{content}}
     </main>
 
-    <!-- Footer -->
+{{overlays}}    <!-- Footer -->
     <footer class="footer">
         <div class="footer-content">
             <p class="footer-text">© 2024 YMCA Matara, Sri Lanka. Part of the World YMCA Movement.</p>
@@ -969,163 +1415,581 @@ def generate_news_html(programmes: list, years: list) -> str:
     </footer>
 
     <script>
-        {filter_script}
+        {{script}}
     </script>
 </body>
-</html>'''
+</html>''')
 
+# Container for search hits on news.html (--search)
+SEARCH_RESULTS_HTML = '''
+        <!-- Search Results -->
+        <div class="search-results" id="searchResults"></div>
+'''
 
-def generate_programme_html(title: str, date_str: str, article_html: str, media_files: list) -> str:
-    """Generate the programme detail page with Markdown content"""
-    
-    date_display = format_date_display(date_str)
-    
-    # Generate gallery items
-    gallery_html = ""
-    for media in media_files:
-        ext = Path(media).suffix.lower()
-        if ext in IMAGE_EXTENSIONS:
-            alt_text = Path(media).stem.replace('-', ' ').replace('_', ' ').title()
-            gallery_html += f'''
-            <div class="gallery-item" onclick="openImageViewer('{media}')">
-                <img src="{media}" alt="{alt_text}" loading="lazy">
+# news.html: filters, card grid, pagination and the no-results message
+LISTING_TEMPLATE = Template('''
+        <!-- Filter Section -->
+        <div class="filter-section">{{search}}
+            <div class="filter-row">
+                <span class="filter-label">Filter by:</span>
+                <select id="yearFilter" class="filter-select" onchange="filterProgrammes()">
+                    {{year_options}}
+                </select>
+                <select id="monthFilter" class="filter-select" onchange="filterProgrammes()">
+                    {{month_options}}
+                </select>
             </div>
-            '''
-        elif ext in VIDEO_EXTENSIONS:
-            gallery_html += f'''
-            <div class="gallery-item" onclick="openVideoViewer('{media}')">
-                <video src="{media}" preload="metadata" muted></video>
+        </div>
+{{search_results}}
+        <!-- Programme Cards -->
+        <div class="news-grid" id="newsGrid">
+            {{cards}}
+        </div>
+{{pagination}}{{load_more}}
+        <!-- No Results Message -->
+        <div class="no-results{{no_results_class}}" id="noResults">
+            <div class="no-results-icon">🔍</div>
+            <h3>No programmes found</h3>
+            <p>No programmes match the selected period. Try adjusting your filters.</p>
+        </div>
+        ''')
+
+EMPTY_LISTING_HTML = '''
+        <div class="empty-state">
+            <div class="empty-state-icon">📰</div>
+            <h3>No Programmes Yet</h3>
+            <p>Check back soon for updates on our latest programmes and activities!</p>
+        </div>
+        '''
+
+CARD_TEMPLATE = Template('''
+            <a href="{{root}}news/{{folder}}/index.html" class="{{card_class}}" data-year="{{year}}" data-month="{{month}}"{{placeholder}}>
+                {{thumbnail}}
+                <div class="news-card-header">
+                    <h3>{{title}}</h3>
+                    <div class="news-card-date">
+                        <span>{{date_display}}</span>
+                    </div>
+                </div>
+                <div class="news-card-body">
+                    <p>{{description}}</p>
+                </div>
+                <div class="news-card-footer">
+                    {{footer}}
+                </div>
+            </a>
+            ''')
+
+CARD_THUMBNAIL_TEMPLATE = Template('''
+                {{image}}
+                <div class="card-overlay"></div>
+                ''')
+
+# Programme page: article, gallery and the full-size media viewer
+PROGRAMME_TEMPLATE = Template('''<a href="{{root}}news.html" class="back-link">← Back to News</a>
+        
+        <article class="programme-content">
+            <div class="programme-meta">
+                <span>📅</span>
+                <span>{{date_display}}</span>
             </div>
-            '''
-    
-    # Gallery section (only if there are media files)
-    gallery_section = ""
-    if gallery_html:
-        gallery_section = f'''
+            <div class="article-content">
+                {{article}}
+            </div>
+            {{gallery}}
+        </article>''')
+
+GALLERY_TEMPLATE = Template('''
         <section class="gallery-section">
             <h2>Photos & Videos</h2>
             <div class="gallery-grid">
-                {gallery_html}
-            </div>
+                {{items}}
+            </div>{{more}}
         </section>
-        '''
-    
-    return f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="description" content="{title} - YMCA Matara Programme">
-    <title>{title} | YMCA Matara</title>
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap" rel="stylesheet">
-    <link rel="icon" type="image/png" href="../../images/ymca.png">
-    <style>{get_common_styles()}</style>
-</head>
-<body>
-    <!-- Navigation -->
-    <nav class="navbar">
-        <div class="nav-container">
-            <a href="../../index.html" class="logo">
-                <img src="../../images/ymca.png" class="logo-icon" alt="YMCA Logo">
-                <div class="logo-text">
-                    YMCA Matara
-                    <span>Sri Lanka</span>
-                </div>
-            </a>
-            <button class="mobile-menu-btn" onclick="toggleMenu()" aria-label="Toggle menu">☰</button>
-            <ul class="nav-links" id="navLinks">
-                <li><a href="../../index.html">About</a></li>
-                <li><a href="../../news.html" class="active">News</a></li>
-            </ul>
-        </div>
-    </nav>
+        ''')
 
-    <!-- Page Header -->
-    <header class="page-header">
-        <div class="page-header-content">
-            <h1>{title}</h1>
-        </div>
-    </header>
+GALLERY_IMAGE_TEMPLATE = Template('''
+            <div class="gallery-item" onclick="openImageViewer('{{src}}')"{{placeholder}}>
+                {{image}}
+            </div>
+            ''')
 
-    <!-- Main Content -->
-    <main class="main-content">
-        <a href="../../news.html" class="back-link">← Back to News</a>
-        
-        <article class="programme-content">
-            <div class="programme-meta">
-                <span>📅</span>
-                <span>{date_display}</span>
+GALLERY_VIDEO_TEMPLATE = Template('''
+            <div class="gallery-item" onclick="openVideoViewer('{{src}}')">
+                <video src="{{src}}" preload="metadata" muted></video>
             </div>
-            <div class="article-content">
-                {article_html}
+            ''')
+
+GALLERY_POSTER_TEMPLATE = Template('''
+            <div class="gallery-item" onclick="openVideoViewer('{{src}}')">
+                <video src="{{src}}" poster="{{poster}}" preload="none" muted></video>
             </div>
-            {gallery_section}
-        </article>
-    </main>
+            ''')
 
-    <!-- Media Viewer Modal -->
+VIEWER_OVERLAY_HTML = '''    <!-- Media Viewer Modal -->
     <div id="viewerOverlay" class="viewer-overlay" onclick="closeViewer(event)">
         <button class="viewer-close" onclick="closeViewer(event)">&times;</button>
         <div class="viewer-content" id="viewerContent"></div>
     </div>
 
-    <!-- Footer -->
-    <footer class="footer">
-        <div class="footer-content">
-            <p class="footer-text">© 2024 YMCA Matara, Sri Lanka. Part of the World YMCA Movement.</p>
-        </div>
-    </footer>
+'''
 
-    <script>
-        function toggleMenu() {{
+# Marker after the gallery grid from which GALLERY_LOADER_SCRIPT loads the remaining items
+GALLERY_MORE_HTML = '''
+            <div class="gallery-more" id="galleryMore" data-src="gallery.json" aria-hidden="true"></div>'''
+
+PROGRAMME_SCRIPT = '''function toggleMenu() {
             document.getElementById('navLinks').classList.toggle('active');
-        }}
+        }
 
-        function openImageViewer(src) {{
+        function openImageViewer(src) {
             const overlay = document.getElementById('viewerOverlay');
             const content = document.getElementById('viewerContent');
             content.innerHTML = '<img src="' + src + '" alt="Full size image">';
             overlay.classList.add('active');
             document.body.style.overflow = 'hidden';
-        }}
+        }
 
-        function openVideoViewer(src) {{
+        function openVideoViewer(src) {
             const overlay = document.getElementById('viewerOverlay');
             const content = document.getElementById('viewerContent');
             content.innerHTML = '<video src="' + src + '" controls autoplay></video>';
             overlay.classList.add('active');
             document.body.style.overflow = 'hidden';
-        }}
+        }
 
-        function closeViewer(event) {{
-            if (event) {{
+        function closeViewer(event) {
+            if (event) {
                 const target = event.target;
                 // Only close if clicking overlay background or close button
-                if (!target.closest('.viewer-content') || target.closest('.viewer-close')) {{
+                if (!target.closest('.viewer-content') || target.closest('.viewer-close')) {
                     const overlay = document.getElementById('viewerOverlay');
                     const content = document.getElementById('viewerContent');
                     overlay.classList.remove('active');
                     content.innerHTML = '';
                     document.body.style.overflow = '';
+                }
+            }
+        }
+
+        // Close on Escape key
+        document.addEventListener('keydown', function(e) {
+            if (e.key === 'Escape') {
+                closeViewer({ target: document.getElementById('viewerOverlay') });
+            }
+        });'''
+
+GALLERY_LOADER_SCRIPT = '''
+
+        // Gallery items beyond the first batch come from gallery.json, one batch per scroll to the end
+        const galleryMore = document.getElementById('galleryMore');
+        const galleryBatch = document.querySelectorAll('.gallery-grid .gallery-item').length;
+        let galleryItems = null;
+        let galleryLoading = false;
+
+        function loadGalleryBatch() {
+            if (galleryLoading) return;
+            galleryLoading = true;
+            const ready = galleryItems
+                ? Promise.resolve(galleryItems)
+                : fetch(galleryMore.dataset.src).then(response => response.json()).then(data => galleryItems = data.items);
+            ready.then(items => {
+                const batch = items.splice(0, galleryBatch);
+                document.querySelector('.gallery-grid').insertAdjacentHTML('beforeend', batch.join(''));
+                galleryLoading = false;
+                if (items.length === 0) {
+                    galleryObserver.disconnect();
+                    galleryMore.remove();
+                } else {
+                    // Re-observe so a marker that is still in view triggers the next batch
+                    galleryObserver.unobserve(galleryMore);
+                    galleryObserver.observe(galleryMore);
+                }
+            }).catch(() => { galleryLoading = false; });
+        }
+
+        const galleryObserver = 'IntersectionObserver' in window
+            ? new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) loadGalleryBatch();
+            }, { rootMargin: '600px' })
+            : { observe: loadGalleryBatch, unobserve() {}, disconnect() {} };
+        galleryObserver.observe(galleryMore);'''
+
+
+def generate_card_html(prog: dict, root: str = "") -> str:
+    """Render one programme card for the news grid"""
+    thumbnail_file = prog.get('thumbnail_file')
+    thumbnail_html = ""
+    card_class = "news-card"
+    if thumbnail_file:
+        asset = prog.get('thumbnail_meta', {}).get('asset')
+        thumbnail_html = CARD_THUMBNAIL_TEMPLATE.render(image=get_image_html(
+            f"{root}{asset}" if asset else f"{root}news/{prog['folder']}/{thumbnail_file}",
+            'class="card-bg-thumb" alt="" loading="lazy"',
+            prog.get('thumbnail_meta'),
+            root,
+            CARD_SIZES
+        ))
+        card_class += " has-thumbnail"
+
+    return CARD_TEMPLATE.render(
+        root=root,
+        folder=prog['folder'],
+        card_class=card_class,
+        year=prog['year'],
+        month=prog['month'],
+        placeholder=get_placeholder_style(prog.get('thumbnail_meta')),
+        thumbnail=thumbnail_html,
+        title=prog['title'],
+        date_display=prog['date_display'],
+        description=prog['description'],
+        footer='<span class="footer-btn">View Programme →</span>' if thumbnail_file else 'View Programme →',
+    )
+
+
+def generate_news_html(programmes: list, years: list, css_href: str = None, root: str = "",
+                       listing: dict = None, index_href: str = None, search: bool = False, cards: str = None) -> str:
+    """Generate the main news.html page listing all programmes with filters
+    
+    With a listing ({'year', 'month', 'page', 'pages'}) only the given programmes are rendered as one
+    page of a pre-rendered shard, and the filters navigate between shards instead of hiding cards.
+    With an index_href only the first INDEX_BATCH_SIZE cards are rendered; the rest are rendered
+    in the browser from the JSON programme index. With search a search box backed by the
+    full-text index in news/search/ is added. cards replaces the rendered card grid
+    (write_news_html_streamed() passes a marker there).
+    """
+    total_programmes = len(programmes)
+    if index_href:
+        programmes = programmes[:INDEX_BATCH_SIZE]
+    selected_year = listing['year'] if listing else 'all'
+    selected_month = listing['month'] if listing else 'all'
+    
+    # Archive shards describe their period in the header and title
+    page_title = "News & Programmes"
+    subtitle = "Stay updated with our latest activities and completed programmes"
+    if listing and listing.get('label'):
+        page_title += f" – {listing['label']}"
+        subtitle = f"Programmes from {listing['label']}"
+    if listing and listing['page'] > 1:
+        page_title += f" (Page {listing['page']})"
+    
+    # Generate year and month options
+    year_options = '<option value="all">All Years</option>\n' + "".join(
+        f'                        <option value="{year}"{" selected" if year == selected_year else ""}>{year}</option>\n'
+        for year in years
+    )
+    month_options = '<option value="all">All Months</option>\n' + "".join(
+        f'                        <option value="{i}"{" selected" if str(i) == selected_month else ""}>{month}</option>\n'
+        for i, month in enumerate(MONTH_NAMES, 1)
+    )
+    
+    # Generate programme cards
+    if programmes or listing:
+        # "Show more" button for cards rendered from the JSON index
+        load_more_html = ""
+        if index_href:
+            more_class = "load-more" if total_programmes > len(programmes) else "load-more hidden"
+            load_more_html = f'''
+        <div class="{more_class}" id="loadMore">
+            <button class="load-more-btn" onclick="showMore()">Show more</button>
+        </div>
+'''
+        
+        search_html = ""
+        if search:
+            search_html = '''
+            <div class="search-row">
+                <input type="search" id="searchInput" class="search-input" placeholder="Search programmes..." oninput="onSearchInput(event)" aria-label="Search programmes">
+            </div>'''
+        
+        content_html = LISTING_TEMPLATE.parts(
+            search=search_html,
+            search_results=SEARCH_RESULTS_HTML if search else '',
+            year_options=year_options,
+            month_options=month_options,
+            cards=[generate_card_html(prog, root) for prog in programmes] if cards is None else cards,
+            pagination=f"\n        {generate_pagination_html(listing, root)}\n" if listing else '',
+            load_more=load_more_html,
+            no_results_class=' visible' if listing and not programmes else '',
+        )
+    else:
+        content_html = EMPTY_LISTING_HTML
+    
+    # JavaScript filter function
+    if index_href:
+        filter_script = f'''
+        function toggleMenu() {{
+            document.getElementById('navLinks').classList.toggle('active');
+        }}
+
+        // Cards are rendered from the JSON index (see write_programme_index() in build_site.py)
+        const BATCH_SIZE = {INDEX_BATCH_SIZE};
+        let programmeIndex = null;
+        let matches = [];
+        let shown = document.querySelectorAll('.news-card').length;
+
+        fetch('{index_href}')
+            .then(response => response.json())
+            .then(data => {{
+                programmeIndex = data;
+                matches = data.programmes.map((_, i) => i);
+                // Apply a filter chosen while the index was still loading
+                if (document.getElementById('yearFilter').value !== 'all'
+                        || document.getElementById('monthFilter').value !== 'all') {{
+                    filterProgrammes();
                 }}
+            }});
+
+        // Mirrors get_image_html() and generate_card_html() in build_site.py
+        function thumbnailHtml(prog) {{
+            const src = '{root}' + prog.thumbnail;
+            let attrs = 'class="card-bg-thumb" alt="" loading="lazy"';
+            if (prog.width) attrs += ' width="' + prog.width + '" height="' + prog.height + '"';
+            if (!prog.variants) return '<img src="' + src + '" ' + attrs + '>';
+            const srcset = prog.variants.map(v => '{root}' + v[1] + ' ' + v[0] + 'w').join(', ');
+            const webpSrcset = prog.variants.map(v => '{root}' + v[2] + ' ' + v[0] + 'w').join(', ');
+            return '<picture><source type="image/webp" srcset="' + webpSrcset + '" sizes="{CARD_SIZES}">'
+                + '<img src="' + src + '" srcset="' + srcset + '" sizes="{CARD_SIZES}" ' + attrs + '></picture>';
+        }}
+
+        function cardHtml(prog) {{
+            const thumb = prog.thumbnail ? thumbnailHtml(prog) + '<div class="card-overlay"></div>' : '';
+            return '<a href="{root}news/' + prog.folder + '/index.html" class="news-card' + (prog.thumbnail ? ' has-thumbnail' : '') + '"'
+                + ' data-year="' + prog.year + '" data-month="' + prog.month + '"' + (prog.placeholder || '') + '>' + thumb
+                + '<div class="news-card-header"><h3>' + prog.title + '</h3>'
+                + '<div class="news-card-date"><span>' + prog.date_display + '</span></div></div>'
+                + '<div class="news-card-body"><p>' + prog.description + '</p></div>'
+                + '<div class="news-card-footer">'
+                + (prog.thumbnail ? '<span class="footer-btn">View Programme →</span>' : 'View Programme →')
+                + '</div></a>';
+        }}
+
+        function showMore() {{
+            if (!programmeIndex) return;
+            const batch = matches.slice(shown, shown + BATCH_SIZE);
+            const html = batch.map(i => cardHtml(programmeIndex.programmes[i])).join('');
+            document.getElementById('newsGrid').insertAdjacentHTML('beforeend', html);
+            shown += batch.length;
+            document.getElementById('loadMore').classList.toggle('hidden', shown >= matches.length);
+        }}
+
+        function filterProgrammes() {{
+            if (!programmeIndex) return;
+            const year = document.getElementById('yearFilter').value;
+            const month = document.getElementById('monthFilter').value;
+            if (year === 'all' && month === 'all') {{
+                matches = programmeIndex.programmes.map((_, i) => i);
+            }} else {{
+                matches = (programmeIndex.groups[year] || {{}})[month] || [];
             }}
+
+            document.getElementById('newsGrid').innerHTML = '';
+            shown = 0;
+            showMore();
+            document.getElementById('noResults').classList.toggle('visible', matches.length === 0);
+        }}
+    '''
+    elif listing:
+        filter_script = f'''
+        function toggleMenu() {{
+            document.getElementById('navLinks').classList.toggle('active');
         }}
 
-        // Close on Escape key
-        document.addEventListener('keydown', function(e) {{
-            if (e.key === 'Escape') {{
-                closeViewer({{ target: document.getElementById('viewerOverlay') }});
+        // Each year/month combination with programmes is a pre-rendered page (see listing_path() in
+        // build_site.py); the others share one "no programmes" page that shows the chosen filters
+        const LISTINGS = new Set({json.dumps(listing.get('available', []))});
+
+        function filterProgrammes() {{
+            const year = document.getElementById('yearFilter').value;
+            const month = document.getElementById('monthFilter').value;
+            let path = 'news.html';
+            if (!LISTINGS.has(year + '/' + month)) {{
+                path = '{EMPTY_LISTING_PATH}#' + year + '/' + month;
+            }} else if (year !== 'all' || month !== 'all') {{
+                path = 'news/archive/' + year + '/' + (month !== 'all' ? month + '/' : '') + 'index.html';
             }}
-        }});
-    </script>
-</body>
-</html>'''
+            window.location.href = '{root}' + path;
+        }}
+    '''
+        if listing.get('empty'):
+            filter_script += '''
+        if (location.hash) {
+            const [year, month] = location.hash.slice(1).split('/');
+            document.getElementById('yearFilter').value = year;
+            document.getElementById('monthFilter').value = month;
+        }
+    '''
+    else:
+        filter_script = '''
+        function toggleMenu() {
+            document.getElementById('navLinks').classList.toggle('active');
+        }
+
+        function filterProgrammes() {
+            const yearFilter = document.getElementById('yearFilter').value;
+            const monthFilter = document.getElementById('monthFilter').value;
+            const cards = document.querySelectorAll('.news-card');
+            const noResults = document.getElementById('noResults');
+            
+            let visibleCount = 0;
+
+            cards.forEach(card => {
+                const cardYear = card.dataset.year;
+                const cardMonth = card.dataset.month;
+                
+                const matchYear = yearFilter === 'all' || cardYear === yearFilter;
+                const matchMonth = monthFilter === 'all' || cardMonth === monthFilter;
+
+                if (matchYear && matchMonth) {
+                    card.classList.remove('hidden');
+                    visibleCount++;
+                } else {
+                    card.classList.add('hidden');
+                }
+            });
+
+            // Show/hide no results message
+            if (noResults) {
+                if (visibleCount === 0) {
+                    noResults.classList.add('visible');
+                } else {
+                    noResults.classList.remove('visible');
+                }
+            }
+        }
+    '''
+    if search:
+        filter_script += generate_search_script(root)
+    
+    return "".join(BASE_TEMPLATE.parts(
+        description="Latest news and programmes from YMCA Matara, Sri Lanka.",
+        title=page_title,
+        root=root,
+        stylesheet=get_stylesheet_html(css_href, search=search, pagination=bool(listing), load_more=bool(index_href)),
+        header=f"<h1>News & Programmes</h1>\n            <p>{subtitle}</p>",
+        content=content_html,
+        overlays="",
+        script=filter_script,
+    ))
+
+
+def generate_gallery_items(media_files: list, media_meta: dict = None) -> list:
+    """Render one gallery tile per image or video file"""
+    media_meta = media_meta or {}
+    gallery_items = []
+    for media in media_files:
+        ext = Path(media).suffix.lower()
+        meta = media_meta.get(media, {})
+        # Duplicates of a file seen earlier are referenced at its first occurrence
+        src = f"../../{meta['asset']}" if meta.get('asset') else media
+        if ext in IMAGE_EXTENSIONS:
+            alt_text = Path(media).stem.replace('-', ' ').replace('_', ' ').title()
+            gallery_items.append(GALLERY_IMAGE_TEMPLATE.render(
+                src=src,
+                placeholder=get_placeholder_style(meta),
+                image=get_image_html(src, f'alt="{alt_text}" loading="lazy"', meta, "../../"),
+            ))
+        elif ext in VIDEO_EXTENSIONS and meta.get('poster'):
+            # Nothing is fetched from the video until it is opened in the viewer
+            gallery_items.append(GALLERY_POSTER_TEMPLATE.render(src=src, poster=f"../../{meta['poster']}"))
+        elif ext in VIDEO_EXTENSIONS:
+            gallery_items.append(GALLERY_VIDEO_TEMPLATE.render(src=src))
+    return gallery_items
+
+
+def generate_programme_html(title: str, date_str: str, article_html: str, media_files: list, css_href: str = None,
+                            media_meta: dict = None, gallery_batch: int = 0) -> str:
+    """Generate the programme detail page with Markdown content
+    
+    With gallery_batch only that many gallery items are rendered; the rest are loaded from the
+    programme's gallery.json (see generate_gallery_manifest()) while the visitor scrolls.
+    """
+    
+    date_display = format_date_display(date_str)
+    gallery_items = generate_gallery_items(media_files, media_meta)
+    deferred = bool(gallery_batch) and len(gallery_items) > gallery_batch
+    if deferred:
+        gallery_items = gallery_items[:gallery_batch]
+    
+    # Gallery section (only if there are media files)
+    gallery_section = ""
+    if gallery_items:
+        gallery_section = GALLERY_TEMPLATE.parts(items=gallery_items, more=GALLERY_MORE_HTML if deferred else "")
+    
+    return "".join(BASE_TEMPLATE.parts(
+        description=f"{title} - YMCA Matara Programme",
+        title=title,
+        root="../../",
+        stylesheet=get_stylesheet_html(css_href),
+        header=f"<h1>{title}</h1>",
+        content=PROGRAMME_TEMPLATE.parts(
+            root="../../",
+            date_display=date_display,
+            article=article_html,
+            gallery=gallery_section,
+        ),
+        overlays=VIEWER_OVERLAY_HTML,
+        script=PROGRAMME_SCRIPT + GALLERY_LOADER_SCRIPT if deferred else PROGRAMME_SCRIPT,
+    ))
+
+
+def generate_gallery_manifest(media_files: list, media_meta: dict, gallery_batch: int, minify: bool = False) -> str:
+    """Return gallery.json with the tiles not rendered into the page by gallery_batch, or None if all fit"""
+    gallery_items = generate_gallery_items(media_files, media_meta)[gallery_batch:]
+    if not gallery_batch or not gallery_items:
+        return None
+    if minify:
+        gallery_items = [minify_html(item) for item in gallery_items]
+    return json.dumps({'items': gallery_items}, ensure_ascii=False, separators=(',', ':'))
+
+
+def scan_folder(folder_path: str) -> dict:
+    """List a programme folder once, classifying its entries and keeping (size, mtime) for every file
+    
+    Returns {'info', 'article' (bools), 'thumbnail_file', 'media_files' (sorted), 'file_stats'}.
+    """
+    names = set()
+    media_files = []
+    file_stats = {}
+    
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            names.add(entry.name)
+            stat = entry.stat()
+            file_stats[entry.name] = (stat.st_size, stat.st_mtime_ns)
+            
+            # Skip special files and thumbnails
+            stem, ext = os.path.splitext(entry.name)
+            if entry.name.lower() in ('info.json', 'article.md', 'description.txt', *GENERATED_FILES) or stem.lower() == 'thumbnail':
+                continue
+            # Check if it's a media file
+            ext = ext.lower()
+            if ext in IMAGE_EXTENSIONS or ext in VIDEO_EXTENSIONS:
+                media_files.append(entry.name)
+    
+    # Detect thumbnail file (prefer png, then jpg, then jpeg)
+    thumbnail_file = None
+    for ext in ['.png', '.jpg', '.jpeg']:
+        if f"thumbnail{ext}" in names:
+            thumbnail_file = f"thumbnail{ext}"
+            break
+    
+    # Sort alphabetically
+    media_files.sort()
+    
+    return {
+        'info': 'info.json' in names,
+        'article': 'article.md' in names,
+        'thumbnail_file': thumbnail_file,
+        'media_files': media_files,
+        'file_stats': file_stats,
+    }
 
 
 def scan_programmes() -> list:
-    """Scan the news directory for programme folders and read info.json"""
+    """Scan the news directory for programme folders, listing each folder once and reading info.json"""
     programmes = []
     
     if not NEWS_DIR.exists():
@@ -1133,20 +1997,27 @@ def scan_programmes() -> list:
         NEWS_DIR.mkdir(parents=True, exist_ok=True)
         return programmes
     
-    for item in NEWS_DIR.iterdir():
-        # Skip hidden files/folders and non-directories
-        if item.name.startswith('.') or not item.is_dir():
+    # Stages do not overlap: 'scan' lists news/, 'media' each programme folder, 'json' reads info.json
+    with timed('scan'), os.scandir(NEWS_DIR) as entries:
+        folders = sorted(entries, key=lambda entry: entry.name)
+    
+    for item in folders:
+        # Skip hidden files/folders, non-directories and generated listing folders
+        if item.name.startswith('.') or not item.is_dir() or item.name in GENERATED_DIRS:
             continue
         
-        info_file = item / "info.json"
+        with timed('media', item.name):
+            listing = scan_folder(item.path)
+        folder_path = Path(item.path)
+        info_file = folder_path / "info.json"
         
         # Check for info.json
-        if not info_file.exists():
+        if not listing['info']:
             print(f"    [!] Skipping {item.name}: No info.json found")
             continue
         
         try:
-            with open(info_file, 'r', encoding='utf-8') as f:
+            with timed('json', item.name), open(info_file, 'r', encoding='utf-8') as f:
                 info = json.load(f)
             
             # Validate required fields
@@ -1162,13 +2033,6 @@ def scan_programmes() -> list:
             except:
                 year = '2024'
                 month = '1'
-            
-            # Detect thumbnail file (prefer png, then jpg, then jpeg)
-            thumbnail_file = None
-            for ext in ['.png', '.jpg', '.jpeg']:
-                if (item / f"thumbnail{ext}").exists():
-                    thumbnail_file = f"thumbnail{ext}"
-                    break
 
             programmes.append({
                 'folder': item.name,
@@ -1178,8 +2042,11 @@ def scan_programmes() -> list:
                 'description': description,
                 'year': year,
                 'month': month,
-                'path': item,
-                'thumbnail_file': thumbnail_file
+                'path': folder_path,
+                'thumbnail_file': listing['thumbnail_file'],
+                'has_article': listing['article'],
+                'media_files': listing['media_files'],
+                'file_stats': listing['file_stats']
             })
             
         except json.JSONDecodeError as e:
@@ -1192,33 +2059,1175 @@ def scan_programmes() -> list:
     return programmes
 
 
-def get_media_files(folder_path: Path) -> list:
-    """Get all media files in a programme folder"""
-    media_files = []
+# Seconds spent per build stage, in total and per programme folder, during this build
+build_timings = {'stages': {}, 'programmes': {}}
+
+
+@contextmanager
+def timed(stage: str, folder: str = None):
+    """Add the time spent in the block to a build stage (and to a programme, if given)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        build_timings['stages'][stage] = build_timings['stages'].get(stage, 0) + elapsed
+        if folder:
+            folder_timings = build_timings['programmes'].setdefault(folder, {})
+            folder_timings[stage] = folder_timings.get(stage, 0) + elapsed
+
+
+def merge_timings(folder: str, timings: dict):
+    """Add per-stage timings measured in a worker process for one programme"""
+    for stage, elapsed in timings.items():
+        build_timings['stages'][stage] = build_timings['stages'].get(stage, 0) + elapsed
+        folder_timings = build_timings['programmes'].setdefault(folder, {})
+        folder_timings[stage] = folder_timings.get(stage, 0) + elapsed
+
+
+def print_timing_report(total: float, slowest: int = 10):
+    """Print time per stage and the programmes that took longest to build"""
+    print("Timings:")
+    for stage, elapsed in sorted(build_timings['stages'].items(), key=lambda item: item[1], reverse=True):
+        print(f"    {stage:<12} {elapsed * 1000:>10.1f} ms")
+    print(f"    {'total':<12} {total * 1000:>10.1f} ms (wall clock; stage times are summed across workers)")
     
-    for item in folder_path.iterdir():
-        if item.is_file():
-            ext = item.suffix.lower()
-            # Skip special files and thumbnails
-            if item.name.lower() in ('info.json', 'article.md', 'description.txt', 'index.html') or item.stem.lower() == 'thumbnail':
+    programme_totals = sorted(
+        ((sum(stages.values()), folder, stages) for folder, stages in build_timings['programmes'].items()),
+        reverse=True
+    )
+    if programme_totals:
+        print()
+        print("Slowest programmes:")
+        for elapsed, folder, stages in programme_totals[:slowest]:
+            detail = ", ".join(f"{stage} {ms * 1000:.1f}" for stage, ms in sorted(stages.items()))
+            print(f"    {elapsed * 1000:>8.1f} ms  {folder}  ({detail})")
+    print()
+
+
+# Files written vs. left untouched by write_if_changed() during this build, and whether each changed
+write_stats = {'written': 0, 'unchanged': 0}
+generated_outputs = {}
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write data to a temporary file next to path and rename it into place"""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    """Atomically write content to path unless the file already holds exactly that; returns True if written"""
+    data = content.encode('utf-8')
+    try:
+        if path.stat().st_size == len(data) and hash_file(path) == hash_bytes(data):
+            write_stats['unchanged'] += 1
+            generated_outputs[path] = False
+            return False
+    except FileNotFoundError:
+        pass
+    
+    atomic_write(path, data)
+    write_stats['written'] += 1
+    generated_outputs[path] = True
+    return True
+
+
+def write_parts_if_changed(path: Path, parts) -> bool:
+    """Stream string parts to a temporary file, replacing path only if the content differs; returns True if written
+    
+    Unlike write_if_changed() the content is never held in memory as a whole.
+    """
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for part in parts:
+                data = part.encode('utf-8')
+                digest.update(data)
+                f.write(data)
+                size += len(data)
+        
+        try:
+            unchanged = path.stat().st_size == size and hash_file(path) == digest.hexdigest()[:16]
+        except FileNotFoundError:
+            unchanged = False
+        if unchanged:
+            temp_path.unlink()
+            write_stats['unchanged'] += 1
+            generated_outputs[path] = False
+            return False
+        os.replace(temp_path, path)
+    except BaseException:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+    
+    write_stats['written'] += 1
+    generated_outputs[path] = True
+    return True
+
+
+def remove_output(path: Path):
+    """Delete a generated file together with its pre-compressed siblings"""
+    for file_path in (path, *(path.with_name(path.name + suffix) for suffix in COMPRESSED_SUFFIXES)):
+        if file_path.exists():
+            file_path.unlink()
+
+
+def precompress_outputs(enabled: bool) -> int:
+    """Write maximum-compression .gz (and .br) siblings of generated files; returns siblings written
+    
+    Unchanged files keep existing siblings that are at least as new. When disabled, siblings of
+    generated files are removed so a server never picks up stale compressed content; the same goes
+    for .br siblings while brotli is not installed.
+    """
+    suffixes = ('.gz', '.br') if brotli else ('.gz',)
+    written = 0
+    for path, changed in generated_outputs.items():
+        if path.suffix not in PRECOMPRESS_EXTENSIONS:
+            continue
+        siblings = {suffix: path.with_name(path.name + suffix) for suffix in COMPRESSED_SUFFIXES}
+        if not enabled:
+            for sibling in siblings.values():
+                if sibling.exists():
+                    sibling.unlink()
+            continue
+        
+        for suffix in COMPRESSED_SUFFIXES:
+            if suffix not in suffixes and siblings[suffix].exists():
+                siblings[suffix].unlink()
+        
+        source_mtime = path.stat().st_mtime_ns
+        data = None
+        for suffix in suffixes:
+            sibling = siblings[suffix]
+            if not changed and sibling.exists() and sibling.stat().st_mtime_ns >= source_mtime:
                 continue
-            # Check if it's a media file
-            if ext in IMAGE_EXTENSIONS or ext in VIDEO_EXTENSIONS:
-                media_files.append(item.name)
+            if data is None:
+                data = path.read_bytes()
+            if suffix == '.gz':
+                atomic_write(sibling, gzip.compress(data, compresslevel=9, mtime=0))
+            else:
+                atomic_write(sibling, brotli.compress(data, quality=11))
+            written += 1
+    return written
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return a short SHA-256 hex digest of the given bytes"""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def hash_file(path: Path) -> str:
+    """Return the content hash of a file, or an empty string if it does not exist"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return ""
+    return digest.hexdigest()[:16]
+
+
+def get_build_version(options: dict = None) -> str:
+    """Hash of this script, the markdown version and output options (changes whenever templates or styles change)"""
+    options_json = json.dumps(options or {}, sort_keys=True)
+    return hash_bytes(Path(__file__).read_bytes() + markdown.__version__.encode('utf-8') + options_json.encode('utf-8'))
+
+
+def load_cache(cache_file: Path) -> dict:
+    """Load a JSON cache file from .build_cache, or an empty dict if it is missing or corrupt"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(cache_file: Path, data: dict):
+    """Write a JSON cache file into .build_cache"""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(cache_file, json.dumps(data, indent=2, sort_keys=True).encode('utf-8'))
+
+
+def load_manifest() -> dict:
+    """Load the build manifest from the previous run, or an empty one"""
+    return load_cache(MANIFEST_FILE)
+
+
+def save_manifest(manifest: dict):
+    """Persist the build manifest for the next incremental run"""
+    save_cache(MANIFEST_FILE, manifest)
+
+
+# Content hashes of media files keyed by relative path, reused while size and mtime are unchanged
+FILE_HASHES_FILE = BUILD_CACHE_DIR / "file_hashes.json"
+_file_hashes = None
+
+
+def get_file_hash(path: Path, stat: tuple = None) -> str:
+    """Return the content hash of a (possibly large) file, using the stat-keyed hash cache
     
-    # Sort alphabetically
-    media_files.sort()
+    stat is an optional (size, mtime_ns) pair already collected by scan_folder().
+    """
+    global _file_hashes
+    if _file_hashes is None:
+        _file_hashes = load_cache(FILE_HASHES_FILE)
+    
+    if stat is None:
+        stat_result = path.stat()
+        stat = (stat_result.st_size, stat_result.st_mtime_ns)
+    key = path.relative_to(SCRIPT_DIR).as_posix()
+    cached = _file_hashes.get(key)
+    if cached and cached[0] == stat[0] and cached[1] == stat[1]:
+        return cached[2]
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    file_hash = digest.hexdigest()[:16]
+    _file_hashes[key] = [stat[0], stat[1], file_hash]
+    return file_hash
+
+
+def save_file_hashes(programmes: list):
+    """Persist the file hash cache, dropping entries for files no longer in any programme folder"""
+    if _file_hashes is None:
+        return
+    known = {f"news/{prog['folder']}/{name}" for prog in programmes for name in prog['file_stats']}
+    for key in [key for key in _file_hashes if key not in known]:
+        del _file_hashes[key]
+    save_cache(FILE_HASHES_FILE, _file_hashes)
+
+
+def list_published_files() -> list:
+    """Return the relative paths of all published files (hidden files and folders are never published)"""
+    paths = [
+        entry.name for entry in os.scandir(SCRIPT_DIR)
+        if entry.is_file() and not entry.name.startswith('.') and Path(entry.name).suffix in PUBLISHED_ROOT_SUFFIXES
+    ]
+    for published_dir in PUBLISHED_DIRS:
+        for folder, dirs, names in os.walk(SCRIPT_DIR / published_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            relative_folder = Path(folder).relative_to(SCRIPT_DIR).as_posix()
+            paths.extend(f"{relative_folder}/{name}" for name in names if not name.startswith('.'))
+    return sorted(paths)
+
+
+def git_blob_id(path: Path) -> str:
+    """Return the git object id of a file's content (as "git hash-object" would)"""
+    digest = hashlib.sha1(f"blob {path.stat().st_size}\0".encode('ascii'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_deploy_manifest(unlinked: set = frozenset()) -> dict:
+    """Write the published files with their git object ids and the delta since the last manifest
+    
+    Files git already tracks unmodified take their id from the git index, so only generated or edited
+    files are read. Paths in unlinked (duplicates no page links to, see share_duplicate_media()) are
+    left out and listed under "unlinked". Returns the new manifest; its "files" map relative paths to
+    object ids.
+    """
+    tracked = {}
+    try:
+        index = subprocess.run(['git', 'ls-files', '-s', '-z'], cwd=SCRIPT_DIR, capture_output=True,
+                               text=True, check=True).stdout
+        modified = subprocess.run(['git', 'diff', '--name-only', '--no-renames', '-z'], cwd=SCRIPT_DIR,
+                                  capture_output=True, text=True, check=True).stdout
+        # Index entries read "<mode> <object id> <stage>\t<path>"
+        for entry in filter(None, index.split('\0')):
+            info, path = entry.split('\t', 1)
+            tracked[path] = info.split()[1]
+        for path in filter(None, modified.split('\0')):
+            tracked.pop(path, None)
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    
+    previous = load_cache(DEPLOY_MANIFEST).get('files', {})
+    files = {}
+    for path in list_published_files():
+        if path not in unlinked:
+            files[path] = tracked.get(path) or git_blob_id(SCRIPT_DIR / path)
+    
+    manifest = {
+        'files': files,
+        'unlinked': sorted(unlinked),
+        'added': sorted(path for path in files if path not in previous),
+        'changed': sorted(path for path in files if path in previous and previous[path] != files[path]),
+        'removed': sorted(path for path in previous if path not in files),
+    }
+    atomic_write(DEPLOY_MANIFEST, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def programme_fingerprint(prog: dict, media_files: list, build_version: str) -> str:
+    """Hash every input of a programme page: info.json, article.md, media listing and build version"""
+    folder_path = prog['path']
+    parts = [
+        build_version,
+        hash_file(folder_path / "info.json"),
+        hash_file(folder_path / "article.md"),
+        "\n".join(media_files),
+        json.dumps(prog.get('media_meta', {}), sort_keys=True),
+    ]
+    return hash_bytes("\0".join(parts).encode('utf-8'))
+
+
+def news_fingerprint(programmes: list, years: list, build_version: str) -> str:
+    """Hash the card set shown on news.html"""
+    cards = [
+        [prog['folder'], prog['title'], prog['date'], prog['description'], prog['thumbnail_file'],
+         prog.get('thumbnail_meta')]
+        for prog in programmes
+    ]
+    data = json.dumps([build_version, years, cards], ensure_ascii=False)
+    return hash_bytes(data.encode('utf-8'))
+
+
+def convert_article(article_md: str, md_converter, folder: str) -> str:
+    """Convert Markdown to HTML, reusing .build_cache/markdown/<folder>/<hash>.html when the article is unchanged
+    
+    The hash covers the article text, the markdown version and the enabled extensions. Only the latest
+    rendering is kept per folder; cache hits refresh the file's mtime for prune_markdown_cache().
+    """
+    key_source = f"{markdown.__version__}\0{','.join(MARKDOWN_EXTENSIONS)}\0{article_md}"
+    cache_dir = MARKDOWN_CACHE_DIR / folder
+    cache_file = cache_dir / f"{hash_bytes(key_source.encode('utf-8'))}.html"
+    try:
+        article_html = cache_file.read_text(encoding='utf-8')
+        os.utime(cache_file)
+        return article_html
+    except FileNotFoundError:
+        pass
+    
+    article_html = md_converter.convert(article_md)
+    md_converter.reset()
+    
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for old_file in cache_dir.glob('*.html'):
+        old_file.unlink()
+    atomic_write(cache_file, article_html.encode('utf-8'))
+    return article_html
+
+
+def prune_markdown_cache(folders: set):
+    """Drop cached articles of removed programmes, then the least recently used ones above the size limit"""
+    if not MARKDOWN_CACHE_DIR.exists():
+        return
+    
+    entries = []
+    for cache_dir in MARKDOWN_CACHE_DIR.iterdir():
+        if cache_dir.name not in folders:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            continue
+        for cache_file in cache_dir.glob('*.html'):
+            stat = cache_file.stat()
+            entries.append((stat.st_mtime, stat.st_size, cache_file))
+    
+    total = sum(size for _, size, _ in entries)
+    for _, size, cache_file in sorted(entries, key=lambda entry: entry[0]):
+        if total <= MARKDOWN_CACHE_MAX_BYTES:
+            break
+        cache_file.unlink()
+        total -= size
+
+
+def render_programme(prog: dict, md_converter, media_files: list, css_href: str = None, minify: bool = False,
+                     gallery_batch: int = 0) -> tuple:
+    """Convert a programme's article.md and render its index.html
+    
+    Returns (html, has_article, article_html, gallery_json); gallery_json is None unless gallery_batch
+    leaves items to be loaded later.
+    """
+    article_file = prog['path'] / "article.md"
+    
+    # Read article content
+    has_article = prog['has_article']
+    if has_article:
+        with timed('markdown', prog['folder']):
+            with open(article_file, 'r', encoding='utf-8') as f:
+                article_md = f.read()
+            article_html = convert_article(article_md, md_converter, prog['folder'])
+    else:
+        article_html = "<p>No content available.</p>"
+    
+    with timed('render', prog['folder']):
+        programme_html = generate_programme_html(
+            prog['title'],
+            prog['date'],
+            article_html,
+            media_files,
+            css_href,
+            prog.get('media_meta'),
+            gallery_batch
+        )
+        gallery_json = generate_gallery_manifest(media_files, prog.get('media_meta'), gallery_batch, minify)
+    if minify:
+        with timed('minify', prog['folder']):
+            programme_html = minify_html(programme_html)
+    return programme_html, has_article, article_html, gallery_json
+
+
+def programme_image_names(prog: dict, extensions: set) -> list:
+    """List a programme's thumbnail and gallery files whose extension is in the given set"""
+    names = list(prog['media_files'])
+    if prog.get('thumbnail_file'):
+        names.append(prog['thumbnail_file'])
+    return [name for name in names if Path(name).suffix.lower() in extensions]
+
+
+def get_image_meta(prog: dict, name: str) -> dict:
+    """Return the metadata dict rendered with a programme's thumbnail or gallery file"""
+    if name == prog.get('thumbnail_file'):
+        return prog.setdefault('thumbnail_meta', {})
+    return prog.setdefault('media_meta', {}).setdefault(name, {})
+
+
+def share_duplicate_media(programmes: list) -> tuple:
+    """Point every copy of an identical thumbnail or gallery file at its first occurrence in news/
+    
+    Identical files (a thumbnail repeated in the gallery, a photo reused across programmes) then share
+    one URL, so visitors download and cache them once. No files are copied or moved, so the later
+    copies stay in news/; they are returned so the deploy manifest can leave them out. Copies named
+    in the programme's article.md are still linked from there and are not returned.
+    Returns (files referenced, site-relative paths of unlinked copies, bytes saved by sharing).
+    """
+    first_seen = {}
+    referenced = 0
+    unlinked = set()
+    saved = 0
+    
+    for prog in programmes:
+        article_file = prog['path'] / "article.md"
+        article = article_file.read_text(encoding='utf-8', errors='replace') if prog['has_article'] else ""
+        for name in programme_image_names(prog, IMAGE_EXTENSIONS | VIDEO_EXTENSIONS):
+            source = prog['path'] / name
+            stat = prog['file_stats'].get(name)
+            file_hash = get_file_hash(source, stat)
+            referenced += 1
+            meta = get_image_meta(prog, name)
+            if file_hash not in first_seen:
+                first_seen[file_hash] = (prog['folder'], name)
+                meta.pop('asset', None)
+                continue
+            saved += stat[0] if stat else source.stat().st_size
+            folder, first_name = first_seen[file_hash]
+            meta['asset'] = f"news/{folder}/{first_name}"
+            if name not in article:
+                unlinked.add(f"news/{prog['folder']}/{name}")
+    return referenced, unlinked, saved
+
+
+def _exif_orientation(segment: bytes) -> int:
+    """Return the EXIF orientation tag from a JPEG APP1 segment (1 when absent)"""
+    if segment[:6] != b'Exif\0\0':
+        return 1
+    tiff = segment[6:]
+    endian = '<' if tiff[:2] == b'II' else '>'
+    try:
+        ifd_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        entry_count = struct.unpack(endian + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+        for i in range(entry_count):
+            entry = ifd_offset + 2 + i * 12
+            if struct.unpack(endian + 'H', tiff[entry:entry + 2])[0] == 0x0112:
+                return struct.unpack(endian + 'H', tiff[entry + 8:entry + 10])[0]
+    except struct.error:
+        pass
+    return 1
+
+
+def _jpeg_size(f) -> tuple:
+    """Walk JPEG marker segments up to the first SOF frame header, skipping image data"""
+    orientation = 1
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue
+        length = struct.unpack('>H', f.read(2))[0]
+        if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+            height, width = struct.unpack('>xHH', f.read(5))
+            # Orientations 5-8 rotate the image by 90 degrees when displayed
+            if orientation >= 5:
+                width, height = height, width
+            return width, height
+        # Only the Exif APP1 segment carries orientation; a later XMP APP1 must not reset it
+        if marker == 0xE1:
+            segment = f.read(length - 2)
+            if segment[:6] == b'Exif\0\0':
+                orientation = _exif_orientation(segment)
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def get_image_size(path: Path) -> tuple:
+    """Read an image's displayed (width, height) from its header only; returns None if unknown"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(32)
+            if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return struct.unpack('<HH', head[6:10])
+            if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) >= 30:
+                chunk = head[12:16]
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', head[26:30])
+                    return width & 0x3FFF, height & 0x3FFF
+                if chunk == b'VP8L':
+                    bits = struct.unpack('<I', head[21:25])[0]
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+                if chunk == b'VP8X':
+                    width = int.from_bytes(head[24:27], 'little') + 1
+                    height = int.from_bytes(head[27:30], 'little') + 1
+                    return width, height
+                return None
+            if head[:2] == b'\xff\xd8':
+                return _jpeg_size(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def probe_image_sizes(programmes: list) -> int:
+    """Attach intrinsic width/height to each programme's thumbnail and gallery images; returns images probed
+    
+    Only file headers are read. That is cheaper than hashing whole files for a cache lookup, which a
+    fresh CI checkout (new mtimes) could never hit anyway.
+    """
+    probed = 0
+    for prog in programmes:
+        for name in programme_image_names(prog, PROBE_EXTENSIONS):
+            size = get_image_size(prog['path'] / name)
+            if not size:
+                continue
+            probed += 1
+            meta = get_image_meta(prog, name)
+            meta['width'], meta['height'] = size
+    return probed
+
+
+def generate_derivatives(image_path: Path, cache: dict, stat: tuple = None) -> list:
+    """Create resized JPEG/PNG and WebP copies of an image, cached by its content hash"""
+    source_hash = get_file_hash(image_path, stat)
+    ext = '.png' if image_path.suffix.lower() == '.png' else '.jpg'
+    
+    # Reuse derivatives made by a previous build while all their files still exist
+    widths = cache.get(source_hash)
+    if widths is not None and all(
+        (DERIVED_DIR / f"{source_hash}-{w}{ext}").exists() and (DERIVED_DIR / f"{source_hash}-{w}.webp").exists()
+        for w in widths
+    ):
+        return [derivative_entry(source_hash, w, ext) for w in widths]
+    
+    DERIVED_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(image_path) as img:
+        # Let the JPEG decoder downscale while decoding; the largest derivative still comes from full detail
+        img.draft('RGB', (max(RESPONSIVE_WIDTHS), max(RESPONSIVE_WIDTHS)))
+        img = ImageOps.exif_transpose(img)
+        widths = [w for w in RESPONSIVE_WIDTHS if w <= img.width]
+        if img.width < max(RESPONSIVE_WIDTHS) and img.width not in widths:
+            widths.append(img.width)
+        
+        # Resize largest first so each smaller width starts from an already reduced image
+        resized = img
+        for width in sorted(widths, reverse=True):
+            height = round(img.height * width / img.width)
+            resized = resized.resize((width, height), Image.LANCZOS)
+            if ext == '.jpg':
+                resized.convert('RGB').save(DERIVED_DIR / f"{source_hash}-{width}.jpg", quality=82, optimize=True, progressive=True)
+            else:
+                resized.save(DERIVED_DIR / f"{source_hash}-{width}.png", optimize=True)
+            resized.save(DERIVED_DIR / f"{source_hash}-{width}.webp", quality=80, method=4)
+    
+    cache[source_hash] = widths
+    return [derivative_entry(source_hash, w, ext) for w in widths]
+
+
+def derivative_entry(source_hash: str, width: int, ext: str) -> dict:
+    """Describe one derivative width with paths relative to the site root"""
+    return {
+        'width': width,
+        'src': f"assets/derived/{source_hash}-{width}{ext}",
+        'webp': f"assets/derived/{source_hash}-{width}.webp",
+    }
+
+
+def build_responsive_images(programmes: list) -> int:
+    """Attach srcset derivatives to each programme's thumbnail and gallery images; returns images processed"""
+    cache_file = BUILD_CACHE_DIR / "derivative_widths.json"
+    cache = load_cache(cache_file)
+    used_hashes = set()
+    processed = 0
     
-    return media_files
+    for prog in programmes:
+        for name in programme_image_names(prog, RESPONSIVE_EXTENSIONS):
+            image_path = prog['path'] / name
+            try:
+                variants = generate_derivatives(image_path, cache, prog['file_stats'].get(name))
+            except (OSError, ValueError) as e:
+                print(f"    [!] Could not resize news/{prog['folder']}/{name}: {e}")
+                continue
+            used_hashes.add(get_file_hash(image_path, prog['file_stats'].get(name)))
+            processed += 1
+            if variants:
+                get_image_meta(prog, name)['variants'] = variants
+    
+    # Drop derivatives whose source image is gone
+    for key in [key for key in cache if key not in used_hashes]:
+        del cache[key]
+    if DERIVED_DIR.exists():
+        for derived_file in DERIVED_DIR.iterdir():
+            if derived_file.name.split('-')[0] not in used_hashes:
+                derived_file.unlink()
+    
+    save_cache(cache_file, cache)
+    return processed
+
+
+def extract_poster(video_path: Path, poster_file: Path) -> bool:
+    """Save one frame of a video as a JPEG poster with ffmpeg; returns False if no frame could be extracted"""
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return False
+    
+    temp_path = poster_file.with_name(f".{poster_file.stem}.{os.getpid()}.tmp.jpg")
+    # A frame one second in skips black fade-ins; clips shorter than that use their first frame
+    for offset in ('1', '0'):
+        try:
+            subprocess.run(
+                [ffmpeg, '-v', 'error', '-y', '-ss', offset, '-i', str(video_path), '-frames:v', '1',
+                 '-vf', f"scale='min({POSTER_WIDTH},iw)':-2", '-q:v', '4', str(temp_path)],
+                capture_output=True, timeout=120, check=True
+            )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if temp_path.exists() and temp_path.stat().st_size:
+            os.replace(temp_path, poster_file)
+            return True
+    
+    if temp_path.exists():
+        temp_path.unlink()
+    return False
+
+
+def build_video_posters(programmes: list) -> tuple:
+    """Attach a poster frame to every gallery video, cached as assets/posters/<video hash>.jpg
+    
+    Videos whose frame cannot be extracted (no ffmpeg, unsupported codec) get the generic
+    assets/posters/video.svg, and are retried on the next build. Returns (extracted, generic) counts.
+    """
+    POSTER_DIR.mkdir(parents=True, exist_ok=True)
+    used = {POSTER_FALLBACK.name}
+    extracted = generic = 0
+    
+    for prog in programmes:
+        for name in programme_image_names(prog, VIDEO_EXTENSIONS):
+            video_path = prog['path'] / name
+            poster_name = f"{get_file_hash(video_path, prog['file_stats'].get(name))}.jpg"
+            poster_file = POSTER_DIR / poster_name
+            if poster_file.exists() or extract_poster(video_path, poster_file):
+                used.add(poster_name)
+                poster = f"assets/posters/{poster_name}"
+                extracted += 1
+            else:
+                poster = f"assets/posters/{POSTER_FALLBACK.name}"
+                generic += 1
+            get_image_meta(prog, name)['poster'] = poster
+    
+    if generic:
+        write_if_changed(POSTER_FALLBACK, POSTER_FALLBACK_SVG)
+    for poster_file in POSTER_DIR.iterdir():
+        if poster_file.name not in used or (poster_file == POSTER_FALLBACK and not generic):
+            poster_file.unlink()
+    return extracted, generic
+
+
+def make_placeholder(image_path: Path) -> dict:
+    """Compute the dominant colour and a tiny blurred JPEG preview (as a data URI) of an image"""
+    with Image.open(image_path) as img:
+        img.draft('RGB', (PLACEHOLDER_WIDTH * 4, PLACEHOLDER_WIDTH * 4))
+        img = ImageOps.exif_transpose(img).convert('RGB')
+        height = max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))
+        tiny = img.resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR)
+    
+    red, green, blue = tiny.resize((1, 1), Image.BOX).getpixel((0, 0))
+    buffer = io.BytesIO()
+    tiny.filter(ImageFilter.GaussianBlur(1)).save(buffer, 'JPEG', quality=40)
+    return {
+        'color': f"#{red:02x}{green:02x}{blue:02x}",
+        'uri': "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode('ascii'),
+    }
+
+
+def build_placeholders(programmes: list) -> int:
+    """Attach blurred placeholders to each programme's thumbnail and gallery images; returns images processed"""
+    cache_file = BUILD_CACHE_DIR / "placeholders.json"
+    cache = load_cache(cache_file)
+    used_hashes = set()
+    processed = 0
+    
+    for prog in programmes:
+        for name in programme_image_names(prog, RESPONSIVE_EXTENSIONS | {'.gif', '.webp'}):
+            image_path = prog['path'] / name
+            file_hash = get_file_hash(image_path, prog['file_stats'].get(name))
+            if file_hash not in cache:
+                try:
+                    cache[file_hash] = make_placeholder(image_path)
+                except OSError as e:
+                    print(f"    [!] Could not read news/{prog['folder']}/{name}: {e}")
+                    continue
+            used_hashes.add(file_hash)
+            get_image_meta(prog, name)['placeholder'] = cache[file_hash]
+            processed += 1
+    
+    for key in [key for key in cache if key not in used_hashes]:
+        del cache[key]
+    save_cache(cache_file, cache)
+    return processed
 
 
-def build_site():
-    """Main function to build the site"""
+def strip_jpeg_metadata(data: bytes) -> bytes:
+    """Drop EXIF, XMP, IPTC, comment and multi-picture data from a JPEG, keeping only its EXIF orientation
+    
+    Only header segments change; the compressed image data is copied byte for byte.
+    """
+    if data[:2] != b'\xff\xd8':
+        raise ValueError("not a JPEG file")
+    orientation = 1
+    segments = []
+    pos = 2
+    while True:
+        if pos + 4 > len(data) or data[pos] != 0xFF:
+            raise ValueError("malformed JPEG header")
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0xDA:
+            break
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        segment = data[pos:pos + 2 + length]
+        pos += 2 + length
+        if marker == 0xE1 and orientation == 1:
+            orientation = _exif_orientation(segment[4:])
+        if marker == 0xE2 and segment[4:16] != b'ICC_PROFILE\0':
+            continue
+        if (0xE0 <= marker <= 0xEF and marker not in JPEG_KEPT_APP_MARKERS) or marker == 0xFE:
+            continue
+        segments.append(segment)
+    
+    # Re-attach the orientation as a minimal EXIF block, after the JFIF header if there is one
+    if orientation != 1:
+        exif = b'Exif\0\0MM\0*' + struct.pack('>IHHHIHHI', 8, 1, 0x0112, 3, 1, orientation, 0, 0)
+        app1 = b'\xff\xe1' + struct.pack('>H', len(exif) + 2) + exif
+        segments.insert(1 if segments and segments[0][1] == 0xE0 else 0, app1)
+    
+    # Image data ends at the first EOI; anything after it (e.g. multi-picture previews) is dropped
+    end = data.find(b'\xff\xd9', pos)
+    return b'\xff\xd8' + b''.join(segments) + (data[pos:end + 2] if end != -1 else data[pos:])
+
+
+def optimize_jpeg(data: bytes) -> bytes:
+    """Strip a JPEG's metadata and, if jpegtran is installed, losslessly optimise its Huffman tables"""
+    stripped = strip_jpeg_metadata(data)
+    jpegtran = shutil.which('jpegtran')
+    if not jpegtran:
+        return stripped
+    try:
+        # Only the segments kept by strip_jpeg_metadata() are left to copy
+        result = subprocess.run(
+            [jpegtran, '-copy', 'all', '-optimize'], input=stripped, capture_output=True, timeout=120, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return stripped
+    return result.stdout if result.stdout and len(result.stdout) < len(stripped) else stripped
+
+
+def optimize_png(data: bytes) -> bytes:
+    """Re-encode a PNG with maximum compression, keeping pixels, transparency, colour profile and orientation"""
+    with Image.open(io.BytesIO(data)) as img:
+        if getattr(img, 'is_animated', False):
+            return data
+        img.load()
+        params = {'optimize': True}
+        for key in ('icc_profile', 'transparency'):
+            if key in img.info:
+                params[key] = img.info[key]
+        orientation = img.getexif().get(0x0112, 1)
+        if orientation != 1:
+            exif = Image.Exif()
+            exif[0x0112] = orientation
+            params['exif'] = exif.tobytes()
+        buffer = io.BytesIO()
+        img.save(buffer, 'PNG', **params)
+        
+        # Never keep a re-encoding that changes a single pixel
+        with Image.open(io.BytesIO(buffer.getvalue())) as check:
+            if check.mode != img.mode or check.tobytes() != img.tobytes():
+                return data
+    return buffer.getvalue()
+
+
+def optimize_images(programmes: list) -> tuple:
+    """Losslessly recompress programme photos in place, each file only once; returns (processed, bytes saved)
+    
+    Hashes of files that are already optimised are kept in .build_cache/optimized_images.json.
+    """
+    cache_file = BUILD_CACHE_DIR / "optimized_images.json"
+    cache = load_cache(cache_file)
+    used_hashes = set()
+    processed = saved = 0
+    
+    for prog in programmes:
+        for name in programme_image_names(prog, OPTIMIZE_EXTENSIONS):
+            image_path = prog['path'] / name
+            file_hash = get_file_hash(image_path, prog['file_stats'].get(name))
+            used_hashes.add(file_hash)
+            if file_hash in cache:
+                continue
+            
+            try:
+                data = image_path.read_bytes()
+                # Go by content rather than extension (e.g. PNG thumbnails saved as thumbnail.jpg)
+                if data[:8] == b'\x89PNG\r\n\x1a\n':
+                    if Image is None:
+                        continue
+                    optimized = optimize_png(data)
+                elif data[:2] == b'\xff\xd8':
+                    optimized = optimize_jpeg(data)
+                else:
+                    optimized = data
+            except (OSError, ValueError, struct.error) as e:
+                print(f"    [!] Could not optimise news/{prog['folder']}/{name}: {e}")
+                continue
+            
+            if len(optimized) < len(data):
+                atomic_write(image_path, optimized)
+                saved += len(data) - len(optimized)
+                stat = image_path.stat()
+                prog['file_stats'][name] = (stat.st_size, stat.st_mtime_ns)
+                file_hash = get_file_hash(image_path, prog['file_stats'][name])
+                used_hashes.add(file_hash)
+            cache[file_hash] = len(optimized)
+            processed += 1
+    
+    for key in [key for key in cache if key not in used_hashes]:
+        del cache[key]
+    save_cache(cache_file, cache)
+    return processed, saved
+
+
+def write_news_html_streamed(programmes: list, years: list, css_href: str = None, index_href: str = None,
+                             search: bool = False, minify: bool = False) -> bool:
+    """Write news.html one card at a time, so memory use does not grow with the page; returns True if it changed
+    
+    The page frame is rendered once with a marker in place of the card grid and split around it.
+    """
+    marker = "\0cards\0"
+    frame = generate_news_html(programmes, years, css_href, index_href=index_href, search=search, cards=marker)
+    if minify:
+        frame = minify_html(frame)
+    head, _, tail = frame.partition(marker)
+    
+    def parts():
+        yield head
+        for i, prog in enumerate(programmes[:INDEX_BATCH_SIZE] if index_href else programmes):
+            card_html = generate_card_html(prog)
+            if minify:
+                # minify_html() collapses the whitespace between the inline <a> cards to one space
+                card_html = (" " if i else "") + minify_html(card_html)
+            yield card_html
+        yield tail
+    
+    return write_parts_if_changed(NEWS_HTML, parts())
+
+
+def write_listing_pages(programmes: list, years: list, css_href: str, page_size: int, search: bool = False,
+                        minify: bool = False) -> int:
+    """Write news.html, news/page/N.html and news/archive/<year>/[<month>/] shards; returns pages written
+    
+    Only combinations with programmes get shards; the filters send every other one to EMPTY_LISTING_PATH.
+    """
+    # Bucket programmes once into every year/month combination the filters can select
+    groups = {('all', 'all'): []}
+    for month in range(1, 13):
+        groups[('all', str(month))] = []
+        for year in years:
+            groups.setdefault((year, 'all'), [])
+            groups[(year, str(month))] = []
+    for prog in programmes:
+        for key in (('all', 'all'), ('all', prog['month']), (prog['year'], 'all'), (prog['year'], prog['month'])):
+            groups[key].append(prog)
+    
+    available = [f"{year}/{month}" for (year, month), group in groups.items() if group]
+    written = set()
+    for (year, month), group in groups.items():
+        if not group and (year, month) != ('all', 'all'):
+            continue
+        if year == 'all' and month == 'all':
+            label = None
+        elif year == 'all':
+            label = f"{MONTH_NAMES[int(month) - 1]} (all years)"
+        elif month == 'all':
+            label = year
+        else:
+            label = f"{MONTH_NAMES[int(month) - 1]} {year}"
+        
+        pages = max(1, -(-len(group) // page_size))
+        for page in range(1, pages + 1):
+            rel_path = listing_path(year, month, page)
+            listing = {'year': year, 'month': month, 'page': page, 'pages': pages, 'label': label,
+                       'available': available}
+            written.add(write_listing_page(rel_path, group[(page - 1) * page_size:page * page_size], years,
+                                           css_href, listing, search, minify))
+    
+    # One "no programmes" page serves every empty combination
+    listing = {'year': 'all', 'month': 'all', 'page': 1, 'pages': 1, 'label': None, 'available': available,
+               'empty': True}
+    written.add(write_listing_page(EMPTY_LISTING_PATH, [], years, css_href, listing, search, minify))
+    
+    remove_stale_listing_pages(written)
+    return len(written)
+
+
+def write_listing_page(rel_path: str, programmes: list, years: list, css_href: str, listing: dict,
+                       search: bool, minify: bool) -> Path:
+    """Render one listing shard to its site-relative path; returns the output file"""
+    root = "../" * rel_path.count('/')
+    page_html = generate_news_html(
+        programmes,
+        years,
+        f"{root}{css_href}" if css_href else None,
+        root,
+        listing,
+        search=search
+    )
+    if minify:
+        page_html = minify_html(page_html)
+    output_file = SCRIPT_DIR / rel_path
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    write_if_changed(output_file, page_html)
+    return output_file
+
+
+def remove_stale_listing_pages(keep: set):
+    """Delete generated listing shards that are not in keep, and any folders left empty"""
+    for listing_dir in (PAGE_DIR, ARCHIVE_DIR):
+        if not listing_dir.exists():
+            continue
+        for html_file in listing_dir.rglob('*.html'):
+            if html_file not in keep:
+                remove_output(html_file)
+        for dir_path, dir_names, file_names in os.walk(listing_dir, topdown=False):
+            if not os.listdir(dir_path):
+                os.rmdir(dir_path)
+
+
+def write_programme_index(programmes: list) -> int:
+    """Write news/programmes.json with card data grouped by year and month; returns its size in bytes
+    
+    Entries carry the same thumbnail details generate_card_html() uses (site-relative src, size,
+    srcset variants, placeholder), so cards rendered in the browser match the server-rendered ones.
+    """
+    entries = []
+    groups = {'all': {}}
+    for i, prog in enumerate(programmes):
+        entry = {
+            'folder': prog['folder'],
+            'title': prog['title'],
+            'date': prog['date'],
+            'date_display': prog['date_display'],
+            'year': prog['year'],
+            'month': prog['month'],
+            'thumbnail': None,
+            'description': prog['description'],
+        }
+        if prog.get('thumbnail_file'):
+            meta = prog.get('thumbnail_meta', {})
+            entry['thumbnail'] = meta.get('asset') or f"news/{prog['folder']}/{prog['thumbnail_file']}"
+            if meta.get('width'):
+                entry['width'], entry['height'] = meta['width'], meta['height']
+            if meta.get('variants'):
+                entry['variants'] = [[v['width'], v['src'], v['webp']] for v in meta['variants']]
+            if meta.get('placeholder'):
+                entry['placeholder'] = get_placeholder_style(meta)
+        entries.append(entry)
+        # Index lists for every year/month filter combination except "all"/"all"
+        year_groups = groups.setdefault(prog['year'], {})
+        year_groups.setdefault('all', []).append(i)
+        year_groups.setdefault(prog['month'], []).append(i)
+        groups['all'].setdefault(prog['month'], []).append(i)
+    
+    index_json = json.dumps({'programmes': entries, 'groups': groups}, ensure_ascii=False, separators=(',', ':'))
+    write_if_changed(PROGRAMME_INDEX_JSON, index_json)
+    return len(index_json.encode('utf-8'))
+
+
+def search_tokens(text: str) -> list:
+    """Split text into lowercase search terms (at least two characters, stopwords removed)"""
+    return [
+        token for token in SEARCH_SPLIT.split(text.lower())
+        if len(token) >= 2 and token not in SEARCH_STOPWORDS
+    ]
+
+
+def index_search_document(prog: dict, article_html: str) -> dict:
+    """Count field-weighted term frequencies for one programme"""
+    article_text = html.unescape(re.sub(r'<[^>]+>', ' ', article_html))
+    terms = {}
+    length = 0
+    for field, text in (('title', prog['title']), ('description', prog['description']), ('body', article_text)):
+        weight = SEARCH_FIELD_WEIGHTS[field]
+        for token in search_tokens(text):
+            terms[token] = terms.get(token, 0) + weight
+            length += weight
+    return {'terms': terms, 'length': length}
+
+
+def write_search_index(programmes: list, fingerprints: dict, rendered_articles: dict) -> int:
+    """Update per-programme search entries and write the sharded index; returns the number of files
+    
+    Entries are cached in .build_cache/search_docs.json by programme fingerprint, so only programmes
+    whose inputs changed are re-tokenized. news/search/docs.json holds the document list and BM25
+    parameters; each <hex of first two characters>.json shard maps terms to [doc, tf, doc, tf, ...].
+    """
+    cache_file = BUILD_CACHE_DIR / "search_docs.json"
+    cache = load_cache(cache_file)
+    md_converter = None
+    
+    docs = []
+    shards = {}
+    for doc_id, prog in enumerate(programmes):
+        folder = prog['folder']
+        entry = cache.get(folder)
+        if not entry or entry['fingerprint'] != fingerprints[folder]:
+            article_html = rendered_articles.get(folder)
+            if article_html is None:
+                # Page was skipped by an incremental build; convert the article for the index only
+                if md_converter is None:
+                    md_converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+                article_file = prog['path'] / "article.md"
+                article_html = ""
+                if prog['has_article']:
+                    article_html = convert_article(article_file.read_text(encoding='utf-8'), md_converter, folder)
+            entry = index_search_document(prog, article_html)
+            entry['fingerprint'] = fingerprints[folder]
+            cache[folder] = entry
+        
+        docs.append([folder, prog['title'], prog['date_display'], entry['length']])
+        for term, tf in entry['terms'].items():
+            shards.setdefault(term[:2], {}).setdefault(term, []).extend((doc_id, tf))
+    
+    # Forget programmes that no longer exist
+    folders = {prog['folder'] for prog in programmes}
+    for folder in [folder for folder in cache if folder not in folders]:
+        del cache[folder]
+    save_cache(cache_file, cache)
+    
+    avgdl = sum(doc[3] for doc in docs) / len(docs) if docs else 0
+    files = {'docs': {'docs': docs, 'avgdl': avgdl, 'k1': SEARCH_BM25_K1, 'b': SEARCH_BM25_B}}
+    for prefix, shard in shards.items():
+        files[prefix.encode('utf-8').hex()] = shard
+    
+    SEARCH_DIR.mkdir(parents=True, exist_ok=True)
+    for name, data in files.items():
+        write_if_changed(
+            SEARCH_DIR / f"{name}.json",
+            json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        )
+    
+    for old_file in SEARCH_DIR.glob('*.json'):
+        if old_file.stem not in files:
+            remove_output(old_file)
+    
+    return len(files)
+
+
+# Markdown converter owned by each worker process when building with --jobs
+_worker_converter = None
+
+
+def _init_worker():
+    """Create one Markdown converter per worker process"""
+    global _worker_converter
+    _worker_converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+
+
+def _render_in_worker(task: tuple) -> tuple:
+    """Render one (programme, media_files, css_href, minify, gallery_batch) task in a worker; returns (result, timings)"""
+    prog, media_files, css_href, minify, gallery_batch = task
+    result = render_programme(prog, _worker_converter, media_files, css_href, minify, gallery_batch)
+    return result, build_timings['programmes'].pop(prog['folder'], {})
+
+
+def build_site(incremental: bool = False, jobs: int = 1, external_css: bool = False,
+               responsive_images: bool = False, placeholders: bool = False, page_size: int = 0,
+               json_index: bool = False, search: bool = False, changed_folders: set = None,
+               timings: bool = False, precompress: bool = False, minify: bool = False, stream: bool = False,
+               dedupe_media: bool = False, video_posters: bool = False, gallery_batch: int = 0,
+               optimize: bool = False, deploy_manifest: bool = False):
+    """Main function to build the site
+    
+    With changed_folders, programme folders outside that set are assumed up to date and keep their
+    fingerprints from the previous manifest without being re-hashed. That needs a manifest from a build
+    with the same build version; without one every page is rendered.
+    """
+    started = time.perf_counter()
+    write_stats.update(written=0, unchanged=0)
+    generated_outputs.clear()
+    build_timings['stages'].clear()
+    build_timings['programmes'].clear()
+    
     print("=" * 50)
     print("  YMCA Matara Website Builder v2.0")
     print("=" * 50)
     print()
     
+    if (responsive_images or placeholders) and Image is None:
+        print("[!] Pillow is not installed; building without responsive images or placeholders (pip install pillow)")
+        print()
+        responsive_images = placeholders = False
+    
+    build_version = get_build_version({
+        'external_css': external_css,
+        'responsive_images': responsive_images,
+        'placeholders': placeholders,
+        'page_size': page_size,
+        'json_index': json_index,
+        'search': search,
+        'minify': minify,
+        'precompress': precompress,
+        'dedupe_media': dedupe_media,
+        'video_posters': video_posters,
+        'gallery_batch': gallery_batch,
+    })
+    previous = load_manifest() if incremental or changed_folders is not None else {}
+    if previous.get('build_version') != build_version:
+        previous = {}
+    manifest = {'build_version': build_version, 'news_html': '', 'programmes': {}}
+    
     # Scan for programmes
     print("[*] Scanning for programmes...")
     programmes = scan_programmes()
@@ -1228,54 +3237,208 @@ def build_site():
     # Extract unique years for filter
     years = sorted(set(prog['year'] for prog in programmes), reverse=True)
     
+    # Lossless recompression of uploaded photos (runs first, so later stages see the final files)
+    if optimize:
+        print("[*] Optimising photos...")
+        if not shutil.which('jpegtran'):
+            print("    [!] jpegtran is not installed; JPEGs only get their metadata stripped")
+        if Image is None:
+            print("    [!] Pillow is not installed; PNGs are left as they are")
+        with timed('optimize'):
+            processed, saved = optimize_images(programmes)
+        print(f"    {processed} photo(s) optimised, {saved // 1024} KB saved")
+        print()
+    
+    # Identical media files share the URL of their first copy
+    unlinked_media = set()
+    if dedupe_media:
+        print("[*] Deduplicating media files...")
+        with timed('dedupe'):
+            referenced, unlinked_media, saved = share_duplicate_media(programmes)
+        print(f"    {referenced} media file(s), {len(unlinked_media)} duplicate(s) no longer linked ({saved // 1024} KB shared)")
+        print()
+    
+    # Intrinsic image sizes so <img> tags reserve their space before loading
+    with timed('image sizes'):
+        probe_image_sizes(programmes)
+    
+    # Resized derivatives for thumbnails and gallery images
+    if responsive_images:
+        print("[*] Generating responsive image derivatives...")
+        with timed('derivatives'):
+            processed = build_responsive_images(programmes)
+        print(f"    {processed} image(s) processed")
+        print()
+    elif DERIVED_DIR.exists():
+        shutil.rmtree(DERIVED_DIR)
+    
+    # Blurred previews shown behind cards and gallery images while they load
+    if placeholders:
+        print("[*] Generating image placeholders...")
+        with timed('placeholders'):
+            processed = build_placeholders(programmes)
+        print(f"    {processed} placeholder(s) ready")
+        print()
+    
+    # Poster frames so gallery videos load nothing until they are played
+    if video_posters:
+        print("[*] Extracting video posters...")
+        if not shutil.which('ffmpeg'):
+            print("    [!] ffmpeg is not installed; videos get a generic poster")
+        with timed('posters'):
+            extracted, generic = build_video_posters(programmes)
+        print(f"    {extracted} poster(s) ready, {generic} generic")
+        print()
+    elif POSTER_DIR.exists():
+        shutil.rmtree(POSTER_DIR)
+    
+    # Write the shared stylesheet (pages then link to it instead of inlining the CSS)
+    css_href = None
+    if external_css:
+        css_href = write_stylesheet(minify, search=search, pagination=bool(page_size), load_more=json_index)
+        print(f"[*] Stylesheet: {css_href}")
+        print()
+    
     # Generate news.html
-    print("[*] Generating news.html with filters...")
-    news_html = generate_news_html(programmes, years)
-    with open(NEWS_HTML, 'w', encoding='utf-8') as f:
-        f.write(news_html)
-    print(f"    [OK] Created: {NEWS_HTML}")
+    manifest['news_html'] = news_fingerprint(programmes, years, build_version)
+    if incremental and manifest['news_html'] == previous.get('news_html') and NEWS_HTML.exists():
+        print("[*] news.html is up to date")
+    elif page_size:
+        print(f"[*] Generating paginated news listings ({page_size} per page)...")
+        with timed('news'):
+            pages_written = write_listing_pages(programmes, years, css_href, page_size, search, minify)
+        print(f"    [OK] Created: {NEWS_HTML} and {pages_written - 1} page/archive shard(s)")
+    else:
+        print("[*] Generating news.html with filters...")
+        index_href = None
+        if json_index:
+            with timed('news'):
+                index_size = write_programme_index(programmes)
+            index_href = PROGRAMME_INDEX_JSON.relative_to(SCRIPT_DIR).as_posix()
+            print(f"    [OK] Created: {index_href} ({index_size} bytes)")
+        else:
+            remove_output(PROGRAMME_INDEX_JSON)
+        with timed('news'):
+            if stream:
+                news_changed = write_news_html_streamed(programmes, years, css_href, index_href, search, minify)
+            else:
+                news_html = generate_news_html(programmes, years, css_href, index_href=index_href, search=search)
+                if minify:
+                    news_html = minify_html(news_html)
+                news_changed = write_if_changed(NEWS_HTML, news_html)
+        if news_changed:
+            print(f"    [OK] Created: {NEWS_HTML}")
+        else:
+            print(f"    [=] Unchanged: {NEWS_HTML}")
+        remove_stale_listing_pages(set())
     print()
     
     # Generate programme pages
+    generated = 0
+    rendered_articles = {}
     if programmes:
         print("[*] Generating programme pages...")
-        md_converter = markdown.Markdown(extensions=['extra'])
+        previous_pages = previous.get('programmes', {})
         
+        # Work out which pages need rendering
+        pending = []
         for prog in programmes:
-            folder_path = prog['path']
-            article_file = folder_path / "article.md"
+            media_files = prog['media_files']
+            
+            # Folders outside a scoped rebuild keep their previous fingerprint (with --dedupe-media their
+            # links can point into changed folders, so they are fingerprinted like any other page)
+            if changed_folders is not None and prog['folder'] not in changed_folders and not dedupe_media:
+                if prog['folder'] in previous_pages and 'index.html' in prog['file_stats']:
+                    manifest['programmes'][prog['folder']] = previous_pages[prog['folder']]
+                    continue
             
-            # Read article content
-            article_html = ""
-            if article_file.exists():
-                with open(article_file, 'r', encoding='utf-8') as f:
-                    article_md = f.read()
-                article_html = md_converter.convert(article_md)
-                md_converter.reset()
+            # Skip pages whose inputs have not changed since the last build
+            with timed('fingerprint', prog['folder']):
+                fingerprint = programme_fingerprint(prog, media_files, build_version)
+            manifest['programmes'][prog['folder']] = fingerprint
+            if previous_pages.get(prog['folder']) == fingerprint and 'index.html' in prog['file_stats']:
+                continue
+            pending.append((prog, media_files))
+        
+        page_css_href = f"../../{css_href}" if css_href else None
+        
+        # Render, in worker processes when --jobs > 1 (results keep programme order). Pages are
+        # yielded one at a time and written straight away, so rendered pages never accumulate.
+        def render_pending():
+            if jobs > 1 and len(pending) > 1:
+                with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+                    tasks = [
+                        (prog, media_files, page_css_href, minify, gallery_batch) for prog, media_files in pending
+                    ]
+                    for (prog, _), (result, timings) in zip(pending, executor.map(
+                            _render_in_worker, tasks, chunksize=max(1, len(pending) // (jobs * 4)))):
+                        merge_timings(prog['folder'], timings)
+                        yield result
             else:
-                article_html = "<p>No content available.</p>"
+                md_converter = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+                for prog, media_files in pending:
+                    yield render_programme(prog, md_converter, media_files, page_css_href, minify, gallery_batch)
+        
+        for (prog, media_files), (programme_html, has_article, article_html, gallery_json) in zip(
+                pending, render_pending()):
+            if search:
+                rendered_articles[prog['folder']] = article_html
+            if not has_article:
                 print(f"    [!] No article.md found in {prog['folder']}")
             
-            # Get media files
-            media_files = get_media_files(folder_path)
-            
-            # Generate HTML
-            programme_html = generate_programme_html(
-                prog['title'],
-                prog['date'],
-                article_html,
-                media_files
-            )
-            
-            # Write to file
-            output_file = folder_path / "index.html"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(programme_html)
+            # Write to file (left untouched when the rendered page is identical)
+            generated += 1
+            with timed('write', prog['folder']):
+                page_changed = write_if_changed(prog['path'] / "index.html", programme_html)
+                if gallery_json is not None:
+                    write_if_changed(prog['path'] / "gallery.json", gallery_json)
+                else:
+                    remove_output(prog['path'] / "gallery.json")
+            if not page_changed:
+                continue
             
             print(f"    [OK] Created: news/{prog['folder']}/index.html")
             if media_files:
                 print(f"         {len(media_files)} media file(s) included")
+        
+        if generated < len(programmes):
+            print(f"    {len(programmes) - generated} unchanged programme page(s) skipped")
+        print()
+    
+    # Full-text search index (only changed programmes are re-tokenized)
+    if search:
+        print("[*] Updating search index...")
+        with timed('search'):
+            index_files = write_search_index(programmes, manifest['programmes'], rendered_articles)
+        print(f"    [OK] Created: news/search/ ({index_files} file(s))")
         print()
+    elif SEARCH_DIR.exists():
+        shutil.rmtree(SEARCH_DIR)
+    
+    # Pre-compressed siblings for static hosts and reverse proxies
+    if precompress:
+        print("[*] Pre-compressing generated files...")
+        if brotli is None:
+            print("    [!] brotli is not installed; writing .gz only (pip install brotli)")
+    with timed('compress'):
+        compressed = precompress_outputs(precompress)
+    if precompress:
+        print(f"    [OK] {compressed} compressed file(s) written")
+        print()
+    
+    # Published files and the delta since the previous deploy
+    if deploy_manifest:
+        print("[*] Writing deploy manifest...")
+        with timed('deploy'):
+            delta = write_deploy_manifest(unlinked_media)
+        print(f"    [OK] Created: {DEPLOY_MANIFEST.name} ({len(delta['files'])} file(s): {len(delta['added'])} added, "
+              f"{len(delta['changed'])} changed, {len(delta['removed'])} removed)")
+        print()
+    # Without the option an existing manifest is left alone: it is the baseline of the next deploy
+    
+    prune_markdown_cache({prog['folder'] for prog in programmes})
+    save_file_hashes(programmes)
+    save_manifest(manifest)
     
     print("=" * 50)
     print("[+] Build complete!")
@@ -1283,8 +3446,11 @@ def build_site():
     print("Summary:")
     print(f"    - news.html updated with {len(programmes)} programme(s)")
     print(f"    - Year/Month filter enabled with {len(years)} year(s)")
-    print(f"    - {len(programmes)} programme page(s) generated")
+    print(f"    - {generated} programme page(s) generated")
+    print(f"    - {write_stats['written']} file(s) written, {write_stats['unchanged']} unchanged")
     print()
+    if timings:
+        print_timing_report(time.perf_counter() - started)
     print("Next steps:")
     print("    1. Run: python -m http.server 8000")
     print("    2. Open: http://localhost:8000")
@@ -1292,5 +3458,316 @@ def build_site():
     print("=" * 50)
 
 
+def snapshot_news_tree() -> dict:
+    """Map every source file in the programme folders to its (mtime, size)"""
+    snapshot = {}
+    if not NEWS_DIR.exists():
+        return snapshot
+    with os.scandir(NEWS_DIR) as folders:
+        for folder in folders:
+            if folder.name.startswith('.') or folder.name in GENERATED_DIRS or not folder.is_dir():
+                continue
+            with os.scandir(folder.path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or entry.name in GENERATED_FILES or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    snapshot[(folder.name, entry.name)] = (stat.st_mtime_ns, stat.st_size)
+            # An empty folder still counts, so creating or deleting it triggers a rebuild
+            snapshot.setdefault((folder.name, ''), (0, 0))
+    return snapshot
+
+
+# Live-reload state shared between the watcher and the dev server's event streams
+_reload_condition = threading.Condition()
+_reload_generation = 0
+
+LIVE_RELOAD_SCRIPT = b'''<script>
+    new EventSource('/__livereload').onmessage = function() { location.reload(); };
+</script>
+'''
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """Static file handler that injects the live-reload script into HTML and serves /__livereload events"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(SCRIPT_DIR), **kwargs)
+    
+    def do_GET(self):
+        if self.path == '/__livereload':
+            self.stream_reload_events()
+            return
+        
+        file_path = Path(self.translate_path(self.path))
+        if file_path.is_dir():
+            file_path = file_path / "index.html"
+        if file_path.suffix != '.html' or not file_path.is_file():
+            super().do_GET()
+            return
+        
+        body = file_path.read_bytes().replace(b'</body>', LIVE_RELOAD_SCRIPT + b'</body>')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def stream_reload_events(self):
+        """Hold the connection open and send one event per finished rebuild"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        
+        seen = _reload_generation
+        try:
+            while True:
+                with _reload_condition:
+                    _reload_condition.wait_for(lambda: _reload_generation != seen, timeout=15)
+                if _reload_generation != seen:
+                    seen = _reload_generation
+                    self.wfile.write(b'data: reload\n\n')
+                else:
+                    self.wfile.write(b': ping\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def watch_site(build_options: dict, port: int = None):
+    """Rebuild changed programmes whenever news/ changes; with a port also serve the site with live reload"""
+    global _reload_generation
+    build_options = dict(build_options, incremental=True)
+    build_site(**build_options)
+    
+    if port:
+        server = ThreadingHTTPServer(('', port), LiveReloadHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[*] Serving http://localhost:{port}/ with live reload")
+    print("[*] Watching news/ for changes (Ctrl+C to stop)...")
+    
+    snapshot = snapshot_news_tree()
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            current = snapshot_news_tree()
+            if current == snapshot:
+                continue
+            
+            changed = {key[0] for key, _ in set(current.items()) ^ set(snapshot.items())}
+            snapshot = current
+            started = time.perf_counter()
+            try:
+                build_site(changed_folders=changed, **build_options)
+            except Exception as e:
+                print(f"[!] Rebuild failed: {e}")
+                continue
+            print(f"[*] Rebuilt {', '.join(sorted(changed))} in {time.perf_counter() - started:.2f}s")
+            
+            with _reload_condition:
+                _reload_generation += 1
+                _reload_condition.notify_all()
+    except KeyboardInterrupt:
+        print()
+        print("[*] Stopped watching")
+
+
+def git_changed_folders(revision_range: str) -> set:
+    """Return the programme folders whose sources changed in a git revision range (e.g. "abc123..HEAD")
+    
+    Returns None when everything has to be rebuilt: the range cannot be resolved (such as the all-zero
+    "before" commit of a new branch) or it changes this script.
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'diff', '--name-only', '--relative', '-z', revision_range, '--'],
+            cwd=SCRIPT_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    
+    news_prefix = NEWS_DIR.relative_to(SCRIPT_DIR).as_posix() + "/"
+    folders = set()
+    for path in filter(None, result.stdout.split('\0')):
+        if path == Path(__file__).name:
+            return None
+        if not path.startswith(news_prefix):
+            continue
+        # Only files inside a programme folder count; generated pages and listings are ignored
+        parts = path[len(news_prefix):].split('/')
+        if len(parts) < 2 or parts[0] in GENERATED_DIRS or parts[-1] in GENERATED_FILES:
+            continue
+        folders.add(parts[0])
+    return folders
+
+
+def profile_build(build_options: dict, output_prefix: str):
+    """Run one build under cProfile and write <prefix>.prof plus a <prefix>.json timing trace"""
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        build_site(**build_options)
+    finally:
+        profiler.disable()
+    total = time.perf_counter() - started
+    
+    prof_file = Path(f"{output_prefix}.prof")
+    trace_file = Path(f"{output_prefix}.json")
+    profiler.dump_stats(prof_file)
+    with open(trace_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_seconds': total,
+            'options': build_options,
+            'stages': build_timings['stages'],
+            'programmes': build_timings['programmes'],
+        }, f, indent=2, sort_keys=True)
+    
+    print("Profile (top 15 by cumulative time):")
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+    print(f"[OK] Profile written: {prof_file} (open with: python -m pstats {prof_file})")
+    print(f"[OK] Timing trace written: {trace_file}")
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for counts where 0 means "off" or "automatic" and negative values make no sense"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Build the YMCA Matara news pages.")
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="only regenerate pages whose inputs changed since the last build (uses .build_cache/manifest.json)"
+    )
+    parser.add_argument(
+        '--jobs', '-j', type=non_negative_int, default=1, metavar='N',
+        help="render programme pages in N worker processes (0 = one per CPU core)"
+    )
+    parser.add_argument(
+        '--external-css', action='store_true',
+        help="write the common styles once to assets/site.<hash>.css and link it from every page"
+    )
+    parser.add_argument(
+        '--responsive-images', action='store_true',
+        help="generate resized JPEG/PNG + WebP derivatives in assets/derived and emit srcset/sizes (needs Pillow)"
+    )
+    parser.add_argument(
+        '--placeholders', action='store_true',
+        help="inline a blurred preview and dominant colour behind every card and gallery image (needs Pillow)"
+    )
+    listing = parser.add_mutually_exclusive_group()
+    listing.add_argument(
+        '--page-size', type=non_negative_int, default=0, metavar='N',
+        help="show N cards per page and pre-render news/page/ and news/archive/ shards for the year/month filters"
+    )
+    listing.add_argument(
+        '--json-index', action='store_true',
+        help="write news/programmes.json and render filtered cards in the browser from it"
+    )
+    parser.add_argument(
+        '--search', action='store_true',
+        help="add a search box to news.html backed by a sharded full-text index in news/search/"
+    )
+    parser.add_argument(
+        '--watch', action='store_true',
+        help="keep running and rebuild changed programmes whenever news/ changes"
+    )
+    parser.add_argument(
+        '--serve', type=int, nargs='?', const=8000, default=None, metavar='PORT',
+        help="like --watch, and also serve the site on PORT (default 8000) with live reload"
+    )
+    parser.add_argument(
+        '--timings', action='store_true',
+        help="print time spent per build stage and the slowest programmes"
+    )
+    parser.add_argument(
+        '--profile', metavar='PREFIX',
+        help="profile the build with cProfile and write PREFIX.prof and a PREFIX.json timing trace "
+             "(worker processes from --jobs are not profiled)"
+    )
+    parser.add_argument(
+        '--precompress', action='store_true',
+        help="write maximum-compression .gz (and .br, if brotli is installed) siblings of every generated file"
+    )
+    parser.add_argument(
+        '--minify', action='store_true',
+        help="strip comments and redundant whitespace from generated pages and compact inline CSS/JS"
+    )
+    parser.add_argument(
+        '--stream', action='store_true',
+        help="write news.html card by card instead of building the whole page in memory (ignored with --page-size)"
+    )
+    parser.add_argument(
+        '--dedupe-media', action='store_true',
+        help="reference identical photos/videos from their first copy in news/ so each is downloaded once "
+             "(the copies stay in news/; with --deploy-manifest they are left out of the files to upload)"
+    )
+    parser.add_argument(
+        '--video-posters', action='store_true',
+        help="show a poster frame for gallery videos (extracted with ffmpeg) and load nothing else until played"
+    )
+    parser.add_argument(
+        '--gallery-batch', type=non_negative_int, default=0, metavar='N',
+        help="render only the first N gallery items per page and load the rest from gallery.json while scrolling"
+    )
+    parser.add_argument(
+        '--optimize-images', action='store_true',
+        help="losslessly recompress photos in news/ and strip their metadata (keeps orientation; uses jpegtran/Pillow)"
+    )
+    parser.add_argument(
+        '--git-range', metavar='A..B',
+        help="only re-render programme folders changed between two git revisions (news.html and indexes are "
+             "always rebuilt; falls back to a full build if the range is unknown or changes build_site.py)"
+    )
+    parser.add_argument(
+        '--deploy-manifest', action='store_true',
+        help=f"write {DEPLOY_MANIFEST.name}: content hashes of all published files and the files added, "
+             "changed or removed since the previous manifest, so a deploy can upload only the delta"
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    build_site()
+    args = parse_args()
+    build_options = dict(
+        incremental=args.incremental,
+        jobs=args.jobs or os.cpu_count() or 1,
+        external_css=args.external_css,
+        responsive_images=args.responsive_images,
+        placeholders=args.placeholders,
+        page_size=args.page_size,
+        json_index=args.json_index,
+        search=args.search,
+        timings=args.timings or bool(args.profile),
+        precompress=args.precompress,
+        minify=args.minify,
+        stream=args.stream,
+        dedupe_media=args.dedupe_media,
+        video_posters=args.video_posters,
+        gallery_batch=args.gallery_batch,
+        optimize=args.optimize_images,
+        deploy_manifest=args.deploy_manifest,
+    )
+    if args.watch or args.serve:
+        watch_site(build_options, args.serve)
+    elif args.git_range:
+        changed = git_changed_folders(args.git_range)
+        if changed is None:
+            print(f"[!] Cannot scope the build to {args.git_range}; rebuilding every programme")
+        else:
+            print(f"[*] {len(changed)} programme folder(s) changed in {args.git_range}: {', '.join(sorted(changed))}")
+        build_site(changed_folders=changed, **build_options)
+    elif args.profile:
+        profile_build(build_options, args.profile)
+    else:
+        build_site(**build_options)